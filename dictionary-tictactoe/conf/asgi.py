@@ -13,12 +13,13 @@ import tictactoe.ws_routing
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
+from tictactoe.helper.static import StaticFilesApp
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "conf.settings")
 
 application = ProtocolTypeRouter(
     {
-        "http": get_asgi_application(),
+        "http": StaticFilesApp(get_asgi_application()),
         "websocket": AuthMiddlewareStack(URLRouter(tictactoe.ws_routing.websocket_urlpatterns)),
     }
 )
@@ -50,6 +50,7 @@ INSTALLED_APPS += DJANGO_APPS
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "django.middleware.http.ConditionalGetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -88,7 +89,62 @@ CHANNEL_LAYERS = {
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = {"default": dj_database_url.config(env="DATABASE_URL")}
+# connections are kept open and reused by the threads of the db pool
+DATABASES = {"default": dj_database_url.config(env="DATABASE_URL", conn_max_age=600)}
+
+# Number of threads, and so connections, a worker uses for the db
+DB_POOL_SIZE = 4
+# Max number of game models each worker caches
+MODEL_CACHE_SIZE = 10000
+# Seconds a cached model is trusted, the rows can be deleted by archive_games in another process
+MODEL_CACHE_TTL = 60 * 10
+
+# Game events are written to the db once this many of them are pending for a room
+GAME_EVENT_BATCH_SIZE = 32
+
+# Number of players a room waits for before its game starts
+ROOM_MAX_PLAYERS = 2
+# Seconds the seat of a disconnected player is held for it to reconnect, 0 disables reconnects
+SESSION_GRACE_PERIOD = 30
+# Websocket frames at least this many characters long are sent zlib compressed as binary frames,
+# None sends every frame as text
+WS_COMPRESSION_MIN_SIZE = 1024
+# zlib level of the compressed frames, 1 is the fastest and 9 the smallest
+WS_COMPRESSION_LEVEL = 6
+
+# Seconds to wait for the room to fill up before bots take the empty seats, None disables bots
+BOT_JOIN_TIMEOUT = 30
+# Seconds between the moves of a bot, and the seconds a bot can spend searching for a move
+BOT_MOVE_INTERVAL = 5
+BOT_MOVE_TIME_BUDGET = 0.2
+# Number of worker processes that search for the bot moves
+BOT_WORKERS = 1
+
+# Seconds a room can stay idle in memory before it's saved and evicted,
+# ended and aborted rooms are evicted after ROOM_ENDED_TTL instead
+ROOM_IDLE_TTL = 60 * 60
+ROOM_ENDED_TTL = 60
+ROOM_SWEEP_INTERVAL = 30
+# Max number of rooms a worker keeps in memory, the least recently used lobbies are evicted over it
+ROOM_MAX_RESIDENT = 10000
+
+# Size of the shared boards and their chunks, the clients subscribe to the chunks in their viewport
+BOARD_GRID_SIZE = 1024
+BOARD_CHUNK_SIZE = 32
+# Max number of chunks a client can be subscribed to at once
+BOARD_MAX_VIEWPORT_CHUNKS = 16
+# Number of grids that are generated ahead, with the palettes of their seats, for the new rooms
+# of every grid size, palette size and number of seats. The pools are topped up every
+# ROOM_SWEEP_INTERVAL
+GRID_POOL_SIZE = 32
+
+# Elo K factor of a game and the highest rating the leaderboard ranks separately
+RATING_K_FACTOR = 32
+RATING_MAX = 4000
+# Changed ratings are written to the db once this many of them are pending
+RATING_BATCH_SIZE = 500
+# Max number of players the leaderboard endpoint returns
+LEADERBOARD_MAX_TOP = 100
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -129,6 +185,13 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# collectstatic fingerprints the files and precompresses them,
+# they are served from memory by tictactoe.helper.static.StaticFilesApp
+STATICFILES_STORAGE = "tictactoe.storage.CompressedManifestStaticFilesStorage"
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
+# Seconds the rendered pages are cached for
+PAGE_CACHE_SECONDS = 60 * 60
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
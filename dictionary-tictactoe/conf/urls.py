@@ -15,13 +15,26 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from tictactoe.views import create_room, index, join_room, room
+from tictactoe.views import (
+    board,
+    create_room,
+    index,
+    join_room,
+    leaderboard,
+    liveness,
+    readiness,
+    room,
+)
 
 urlpatterns = [
     path("", index),
     path("room/<uuid:room_name>/", room),
+    path("board/<uuid:board_name>/", board),
     path("join-room/", join_room),
     path("join-room/<uuid:room_id>/", join_room),
     path("create-room", create_room),
     path("admin/", admin.site.urls),
+    path("leaderboard", leaderboard),
+    path("healthz", liveness),
+    path("readyz", readiness),
 ]
@@ -23,4 +23,22 @@ function createTable(tableId, row_count, column_count) {
         html += "</tr>"
     }
     document.getElementById(tableId).innerHTML += html;
-}
\ No newline at end of file
+}
+
+// large frames are sent by the server as zlib compressed binary frames
+function decodeFrame(data) {
+    if (typeof data === "string") {
+        return Promise.resolve(JSON.parse(data));
+    }
+    const stream = data.stream().pipeThrough(new DecompressionStream("deflate"));
+    return new Response(stream).text().then(JSON.parse);
+}
+
+// decoding a binary frame is async, the frames are queued so they are handled in the order they came
+function onFrame(handler) {
+    var queue = Promise.resolve();
+    return (e) => {
+        const decoded = decodeFrame(e.data);
+        queue = queue.then(() => decoded).then(handler).catch(console.error);
+    };
+}
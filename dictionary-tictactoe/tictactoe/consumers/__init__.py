@@ -1 +1,2 @@
+from .board import BoardConsumer
 from .room import RoomConsumer
@@ -0,0 +1,156 @@
+import functools
+from typing import List, Set, Tuple
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from django.db.utils import IntegrityError
+from tictactoe.game import GameStateEnum, LargeGame, PlayerState
+from tictactoe.helper import GameManagerMixin
+from tictactoe.helper.compression import CompressedFramesMixin
+from tictactoe.helper.health import is_draining
+
+
+class BoardConsumer(CompressedFramesMixin, GameManagerMixin, AsyncJsonWebsocketConsumer):
+    """Consumer of a large shared board, players can join any time the game is going on.
+
+    The board is never sent as a whole, a client subscribes to the chunks in its viewport
+    and only gets the cells of those chunks and the moves made on them.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.chunk_keys: Set[Tuple[int, int]] = set()
+
+    def get_chunk_group_name(self, key: Tuple[int, int]) -> str:
+        return f"{self.room_group_name}_chunk_{key[0]}_{key[1]}"
+
+    async def connect(self):
+        self.room_group_name = f"board_{self.scope['url_route']['kwargs']['room_id']}"
+        if is_draining():
+            await self.close()
+            return
+
+        try:
+            game, _ = await self.get_or_create_game(
+                self.room_group_name,
+                functools.partial(
+                    LargeGame,
+                    grid_size=settings.BOARD_GRID_SIZE,
+                    chunk_size=settings.BOARD_CHUNK_SIZE,
+                ),
+            )
+        except IntegrityError:
+            await self.close()
+            return
+
+        player = await self.create_player(self.room_group_name, self.channel_name)
+        if not player:
+            await self.close()
+            return
+
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+
+        await self.send_json(
+            {
+                "type": PlayerState.JOINED,
+                "message": {
+                    "player": player.name,
+                    "palette": player.palette,
+                    **game.to_json(),
+                },
+            }
+        )
+
+    async def disconnect(self, close_code):
+        await self.remove_player_from_game(self.room_group_name, self.channel_name)
+
+        await self.update_viewport([])
+        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+
+    async def update_viewport(self, keys: List[Tuple[int, int]]) -> None:
+        """Subscribes to the chunks of the viewport and unsubscribes from the rest,
+        the cells of the newly subscribed chunks are sent to the client
+
+        Args:
+            keys (List[Tuple[int, int]]): Keys of the chunks in the viewport
+        """
+        keys = set(keys)
+        for key in self.chunk_keys - keys:
+            await self.channel_layer.group_discard(
+                self.get_chunk_group_name(key), self.channel_name
+            )
+
+        new_keys = keys - self.chunk_keys
+        for key in new_keys:
+            await self.channel_layer.group_add(self.get_chunk_group_name(key), self.channel_name)
+        self.chunk_keys = keys
+
+        if not new_keys:
+            return
+
+        chunks = await self.get_chunks(self.room_group_name, sorted(new_keys))
+        await self.send_json(
+            {
+                "type": GameStateEnum.CHUNK_SYNC,
+                "message": [{"key": list(key), "cells": cells} for key, cells in chunks.items()],
+            }
+        )
+
+    async def receive_json(self, payload: dict):
+        msg_type = int(payload["type"])
+
+        match msg_type:
+            case GameStateEnum.VIEWPORT_SUBSCRIBE:
+                game = await self._get_game(self.room_group_name)
+                if not game:
+                    return
+
+                x0, y0, x1, y1 = (int(payload[k]) for k in ("x0", "y0", "x1", "y1"))
+                keys = game.board.get_chunk_keys(x0, y0, x1, y1)
+                await self.update_viewport(keys[: settings.BOARD_MAX_VIEWPORT_CHUNKS])
+
+            case GameStateEnum.GAME_STATE_SYNC:
+                can_continue = await self.can_game_continue(self.room_group_name, self.channel_name)
+                if not can_continue:
+                    return
+
+                x, y, letter = int(payload["x"]), int(payload["y"]), payload["letter"]
+                is_updated, words, score = await self.update_board(
+                    self.room_group_name, x, y, self.channel_name, letter
+                )
+
+                if is_updated:
+                    game = await self._get_game(self.room_group_name)
+                    # only the clients looking at the chunk of the cell get the move
+                    await self.channel_layer.group_send(
+                        self.get_chunk_group_name(game.board.get_chunk_key(x, y)),
+                        {
+                            "type": "notify_cell_change",
+                            "message": {"x": x, "y": y, "letter": letter},
+                        },
+                    )
+
+                if words:
+                    await self.group_send_frame(
+                        self.room_group_name,
+                        {
+                            "type": GameStateEnum.WORD_SYNC,
+                            "message": {
+                                "player": self.channel_name,
+                                "words": words,
+                                "score": score,
+                            },
+                        },
+                    )
+
+    async def notify_cell_change(self, payload: dict):
+        await self.send_json(
+            {
+                "type": GameStateEnum.CELL_SYNC,
+                "message": payload["message"],
+            },
+        )
+
+    async def close_room(self, payload: dict):
+        await self.close()
@@ -1,27 +1,43 @@
-from typing import List
+import functools
+from urllib.parse import parse_qs
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 from django.db.utils import IntegrityError
-from tictactoe.game import GameStateEnum, PlayerState, RoomState
+from tictactoe.game import Game, GameStateEnum, PlayerState, RoomState
 from tictactoe.helper import GameManagerMixin
+from tictactoe.helper.compression import CompressedFramesMixin
+from tictactoe.helper.health import is_draining
+from tictactoe.helper.leaderboard import get_rating_id
 
 # in memory game states, game state data is saved when the game ends or it starts
 
 
-class RoomConsumer(GameManagerMixin, AsyncJsonWebsocketConsumer):
+class RoomConsumer(CompressedFramesMixin, GameManagerMixin, AsyncJsonWebsocketConsumer):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
 
     async def connect(self):
         self.room_group_name = f"room_{self.scope['url_route']['kwargs']['room_id']}"
+        # a draining worker is about to shut down, don't start new games on it
+        if is_draining():
+            await self.close()
+            return
+
         # if there is a game_state on websocket connect,
         # try getting the game state
         try:
-            game, _ = await self.get_or_create_game(self.room_group_name)
+            game, _ = await self.get_or_create_game(
+                self.room_group_name,
+                functools.partial(Game, max_players=settings.ROOM_MAX_PLAYERS),
+            )
         except IntegrityError:
             await self.close()
             return
 
+        if await self.reconnect():
+            return
+
         # if the game state is ended, in progress or aborted, close the connection
         if game.room_state in [
             RoomState.GAME_ENDED,
@@ -31,8 +47,12 @@ class RoomConsumer(GameManagerMixin, AsyncJsonWebsocketConsumer):
             await self.close()
             return
 
+        # the client keeps the token of its rating id, so it's rated as the same player every game
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        rating_id, rating_token = get_rating_id(query.get("rating", [None])[0])
+
         # add the player
-        player = await self.create_player(self.room_group_name, self.channel_name)
+        player = await self.create_player(self.room_group_name, self.channel_name, rating_id)
 
         # if the player is not created, disconnect the socket
         if not player:
@@ -46,31 +66,87 @@ class RoomConsumer(GameManagerMixin, AsyncJsonWebsocketConsumer):
         await self.send_json(
             {
                 "type": PlayerState.JOINED,
-                "message": {"player": player.name, "palette": player.palette},
+                "message": {
+                    "player": player.name,
+                    "palette": player.palette,
+                    "session": self.create_session(self.room_group_name, player.name),
+                    "rating": rating_token,
+                },
             }
         )
 
         if game.room_state == RoomState.GAME_IN_PROGRESS:
             # send the initial game state to players if the game is in progress
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "start_game",
-                    "message": game.to_json(),
-                },
+            await self.group_send_frame(
+                self.room_group_name, {"type": RoomState.GAME_START, "message": game.to_json()}
             )
 
         # TODO, being able to watch an ongoing game?
 
+    async def reconnect(self) -> bool:
+        """Puts the player back into the seat of its session if it's reconnecting,
+        and sends it the game if it missed anything while it was away
+
+        Returns:
+            bool: Whether the player is reconnected
+        """
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        if not (token := query.get("session", [None])[0]):
+            return False
+
+        player = await self.resume_session(self.room_group_name, token, self.channel_name)
+        if not player:
+            return False
+
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+        await self.send_json(
+            {
+                "type": PlayerState.JOINED,
+                "message": {"player": player.name, "palette": player.palette, "session": token},
+            }
+        )
+
+        # the seq of the game is its version, the client sends the last one it has seen
+        game = await self._get_game(self.room_group_name)
+        try:
+            seen_seq = int(query.get("seq", [0])[0])
+        except ValueError:
+            seen_seq = 0
+        if seen_seq < game.seq:
+            await self.send_json({"type": PlayerState.RECONNECTED, "message": game.to_json()})
+
+        # the others only know the name of the old connection
+        await self.group_send_frame(
+            self.room_group_name,
+            {
+                "type": GameStateEnum.PALETTE_SYNC,
+                "message": await self.get_players(self.room_group_name),
+            },
+        )
+        return True
+
     async def disconnect(self, close_code):
-        player, _ = await self.remove_player_from_game(self.room_group_name, self.channel_name)
+        # a player in a running game gets some time to come back before the game is reset
+        if await self.hold_seat(self.room_group_name, self.channel_name):
+            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+            return
+
+        player, room_state = await self.remove_player_from_game(
+            self.room_group_name, self.channel_name
+        )
 
         # if only one player leaves
         # send the group that channel_name is disconnected
+        # and whether the game goes on without it
         if player:
             await self.channel_layer.group_send(
                 self.room_group_name,
-                {"type": "notify_player_disconnected", "message": player.name},
+                {
+                    "type": "notify_player_disconnected",
+                    "message": player.name,
+                    "room_state": room_state,
+                },
             )
         # Leave room group
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
@@ -92,56 +168,24 @@ class RoomConsumer(GameManagerMixin, AsyncJsonWebsocketConsumer):
                     self.room_group_name, x, y, self.channel_name, letter
                 )
 
-                if is_updated:
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            "type": "update_game_state",
-                            "message": {"game_data": game_data},
-                        },
-                    )
-
-                if is_finished:
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            "type": "notify_game_ended",
-                            "message": {"winner": self.channel_name},
-                        },
-                    )
+                await self.notify_move(
+                    self.room_group_name, self.channel_name, is_updated, is_finished, game_data
+                )
 
             case PlayerState.STEAL_PALETTE:
+                # the server picks the opponent if the client doesn't name one
                 if await self.steal_palette(
-                    self.room_group_name, self.channel_name, payload["player"]
+                    self.room_group_name, self.channel_name, payload.get("player")
                 ):
-                    await self.channel_layer.group_send(
+                    await self.group_send_frame(
                         self.room_group_name,
                         {
-                            "type": "notify_palette_change",
-                            "players": await self.get_players(self.room_group_name),
+                            "type": GameStateEnum.PALETTE_SYNC,
+                            "message": await self.get_players(self.room_group_name),
                         },
                     )
 
     # Receive message from room group
-    async def update_game_state(self, payload: dict):
-        # this function will be called for every channel
-        # this means anything put here will be called _TWICE_ for our game
-        # better to update the game in receive_json function then send the updated game
-        await self.send_json(
-            {
-                "type": GameStateEnum.GAME_STATE_SYNC,
-                "message": payload["message"]["game_data"],
-            }
-        )
-
-    async def start_game(self, payload: dict):
-        await self.send_json(
-            {
-                "type": RoomState.GAME_START,
-                "message": payload["message"],
-            },
-        )
-
     async def notify_game_ended(self, payload: dict):
         await self.send_json(
             {
@@ -150,18 +194,15 @@ class RoomConsumer(GameManagerMixin, AsyncJsonWebsocketConsumer):
             },
         )
 
-    async def notify_palette_change(self, payload: List[dict]):
-        await self.send_json(
-            {
-                "type": GameStateEnum.PALETTE_SYNC,
-                "message": payload["players"],
-            },
-        )
-
     async def notify_player_disconnected(self, payload: dict):
         await self.send_json(
             {
                 "type": PlayerState.DISCONNECTED,
                 "message": payload["message"],
+                "room_state": payload["room_state"],
             },
         )
+
+    async def close_room(self, payload: dict):
+        # the room is evicted from the memory of the server
+        await self.close()
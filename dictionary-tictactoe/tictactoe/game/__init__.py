@@ -1,3 +1,4 @@
-from .enums import GameStateEnum, GameTasks, PlayerState, RoomState
+from .enums import GameEventType, GameStateEnum, GameTasks, PlayerState, RoomState
+from .board import ChunkedBoard, LargeGame
 from .game import Game
-from .player import Player
+from .player import Bot, Player
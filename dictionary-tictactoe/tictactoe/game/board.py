@@ -0,0 +1,289 @@
+import sys
+from typing import Dict, Iterable, List, Tuple, Union
+
+from tictactoe.util.generator import new_seed
+from tictactoe.util.matrix import create_grid
+from tictactoe.util.palette import check_if_word, generate_random_palette
+
+from .enums import GameEventType, RoomState
+from .game import Game
+from .player import Player
+
+
+class ChunkedBoard:
+    """Square board that is stored in chunk_size x chunk_size chunks,
+    a chunk is only created once a letter is put on it or somebody looks at it"""
+
+    __slots__ = ("size", "chunk_size", "chunks")
+
+    def __init__(self, size: int, chunk_size: int = 32) -> None:
+        self.size = size
+        self.chunk_size = chunk_size
+        self.chunks: Dict[Tuple[int, int], List[List[str]]] = {}
+
+    def get_chunk_key(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.chunk_size, y // self.chunk_size
+
+    def get_chunk_keys(self, x0: int, y0: int, x1: int, y1: int) -> List[Tuple[int, int]]:
+        """Returns the keys of the chunks that overlap the x0, y0 - x1, y1 rectangle
+
+        Args:
+            x0 (int): top row of the rectangle
+            y0 (int): left column of the rectangle
+            x1 (int): bottom row of the rectangle
+            y1 (int): right column of the rectangle
+
+        Returns:
+            List[Tuple[int, int]]: Keys of the chunks
+        """
+        last = self.size - 1
+        cx0, cy0 = self.get_chunk_key(min(max(x0, 0), last), min(max(y0, 0), last))
+        cx1, cy1 = self.get_chunk_key(min(max(x1, 0), last), min(max(y1, 0), last))
+        return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+    def has_chunk(self, key: Tuple[int, int]) -> bool:
+        return key in self.chunks
+
+    def set_chunk(self, key: Tuple[int, int], cells: List[List[str]]) -> None:
+        self.chunks[key] = cells
+
+    def get(self, x: int, y: int) -> str:
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return ""
+
+        if (chunk := self.chunks.get(self.get_chunk_key(x, y))) is None:
+            return ""
+        return chunk[x % self.chunk_size][y % self.chunk_size]
+
+    def set(self, x: int, y: int, letter: str) -> None:
+        key = self.get_chunk_key(x, y)
+        if key not in self.chunks:
+            self.chunks[key] = create_grid(self.chunk_size, self.chunk_size, letter_chance=0)
+        self.chunks[key][x % self.chunk_size][y % self.chunk_size] = letter
+
+
+class LargeGame(Game):
+    """Game on a shared board that is too large to send to the clients as a whole
+
+    Players can join while the game is in progress, the clients subscribe to the chunks
+    that are in their viewport and the words are only looked for around the last move.
+    A word doesn't end the board, the player that makes it scores its length and the board
+    keeps going until its last player leaves.
+    """
+
+    __slots__ = ("board", "last_move", "scores")
+    # every player gets its own palette instead of the palettes of the whole room
+    shares_palettes = False
+
+    def __init__(
+        self,
+        grid_size: int = 1024,
+        chunk_size: int = 32,
+        palette_change_cooldown: int = 10,
+        palette_size: int = 10,
+        word_size: int = 5,
+        room_group_name: str = None,
+        seed: int = None,
+    ) -> None:
+        self.board = ChunkedBoard(grid_size, chunk_size)
+        self.last_move = None
+        # player name to the total length of the words the player made
+        self.scores: Dict[str, int] = {}
+        # anyone can join a shared board, there is no limit of seats
+        super().__init__(
+            grid_size=grid_size,
+            palette_change_cooldown=palette_change_cooldown,
+            palette_size=palette_size,
+            word_size=word_size,
+            max_players=None,
+            room_group_name=room_group_name,
+            seed=seed,
+        )
+
+    def _create_board(self, seed: Union[int, None]) -> None:
+        # the chunks are generated when they are first looked at, there is no grid to pre-generate
+        self.seed = new_seed() if seed is None else seed
+
+    def _get_created_event_data(self) -> dict:
+        data = super()._get_created_event_data()
+        # the board is persisted through the chunk events, not as a single grid
+        del data["game_state"], data["max_players"]
+        return {**data, "chunk_size": self.board.chunk_size}
+
+    @property
+    def game_state(self) -> list:
+        return []
+
+    def apply_event(self, event: dict) -> None:
+        data = event["data"]
+        match event["type"]:
+            case GameEventType.CHUNK_CREATED:
+                self.board.set_chunk(tuple(data["key"]), [list(row) for row in data["cells"]])
+            case GameEventType.LETTER_PLACED:
+                self.board.set(data["x"], data["y"], data["letter"])
+                self.last_move = (data["x"], data["y"])
+            case GameEventType.WORDS_MADE:
+                self._add_score(data["player"], data["words"])
+            case _:
+                super().apply_event(event)
+
+    def _get_board_size(self) -> int:
+        size = sys.getsizeof(self.board) + sys.getsizeof(self.board.chunks)
+        for chunk in self.board.chunks.values():
+            size += sys.getsizeof(chunk) + sum(sys.getsizeof(row) for row in chunk)
+        return size + sys.getsizeof(self.scores)
+
+    def to_json(self) -> dict:
+        return {
+            "grid_size": self.grid_size,
+            "chunk_size": self.board.chunk_size,
+            "player_count": len(self.players),
+        }
+
+    def can_join(self) -> bool:
+        return self.room_state in [RoomState.IN_LOBBY, RoomState.GAME_IN_PROGRESS]
+
+    def get_chunks(self, keys: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], list]:
+        """Returns copies of the chunks, the chunks that don't exist yet are created
+        with a few random letters like the grid of a regular game
+
+        Args:
+            keys (Iterable[Tuple[int, int]]): Keys of the chunks
+
+        Returns:
+            Dict[Tuple[int, int], list]: Key to the cells of the chunk
+        """
+        chunks = {}
+        rng = self.get_random()
+        for key in keys:
+            if not self.board.has_chunk(key):
+                cells = create_grid(self.board.chunk_size, self.board.chunk_size, rng=rng)
+                self.board.set_chunk(key, cells)
+                self._record_event(
+                    GameEventType.CHUNK_CREATED,
+                    {"key": list(key), "cells": [row[:] for row in cells]},
+                )
+            chunks[key] = [row[:] for row in self.board.chunks[key]]
+        return chunks
+
+    def create_player(self, name: str, player_class: type = Player) -> Union[Player, None]:
+        """Adds the player to the game, the game starts with its first player
+
+        Args:
+            name (str): Player id for the newly created player
+            player_class (type, optional): Player or Bot. Defaults to Player.
+
+        Returns:
+            Union[Player, None]: Added player, None if the game is over
+        """
+        if not self.can_join():
+            return None
+
+        if name in self.players:
+            return None
+
+        player = player_class(
+            name, generate_random_palette(self.palette_size, rng=self.get_random())
+        )
+        self._add_player(player)
+        self.change_room_state(RoomState.GAME_IN_PROGRESS)
+        return player
+
+    def remove_player(self, name: str) -> Union[Player, None]:
+        """Removes the player, the board is kept as it is for the other players
+
+        Args:
+            name (str): Id of the player to remove
+        Returns:
+            Player: Removed player
+        """
+        if not (player := self.players.pop(name, None)):
+            return
+
+        self._record_event(GameEventType.PLAYER_LEFT, {"name": player.name})
+        if len(self.players) == 0:
+            self.change_room_state(RoomState.GAME_ABORTED)
+
+        return player
+
+    def reopen(self) -> None:
+        """Brings a board that is replayed from its events back into play, the players it had
+        were connected to the worker that held it before, so none of them are still there"""
+        for name in list(self.players):
+            self.players.pop(name)
+            self._record_event(GameEventType.PLAYER_LEFT, {"name": name})
+        self.change_room_state(RoomState.IN_LOBBY)
+
+    def check_for_game_finish(self) -> bool:
+        """A word doesn't finish a shared board, see place_letter
+
+        Returns:
+            bool: Returns true if the board is already ended
+        """
+        return self.room_state == RoomState.GAME_ENDED
+
+    def find_words(self, x: int, y: int) -> List[str]:
+        """Finds the words on the row and the column of a cell that go through the cell
+
+        Args:
+            x (int): row of the cell
+            y (int): column of the cell
+
+        Returns:
+            List[str]: Words that contain the cell
+        """
+        words = []
+        for dx, dy in ((0, 1), (1, 0)):
+            # every window of word_size cells on this line that contains the cell
+            for offset in range(self.word_size):
+                start_x, start_y = x - dx * offset, y - dy * offset
+                word = "".join(
+                    self.board.get(start_x + dx * i, start_y + dy * i)
+                    for i in range(self.word_size)
+                ).lower()
+                if len(word) == self.word_size and check_if_word(word):
+                    words.append(word)
+        return words
+
+    def _add_score(self, player: str, words: List[str]) -> None:
+        self.scores[player] = self.scores.get(player, 0) + sum(len(word) for word in words)
+
+    def update_game(self, x: int, y: int, player: str, letter: str) -> bool:
+        return self.place_letter(x, y, player, letter) is not None
+
+    def place_letter(self, x: int, y: int, player: str, letter: str) -> Union[List[str], None]:
+        """Puts the letter on the board and scores the words it makes for the player,
+        the cell was empty before so every word through it is a new one
+
+        Args:
+            x (int): row of the board
+            y (int): column of the board
+            player (str): player that's trying to update the game
+            letter (str): player's letter
+        Returns:
+            Union[List[str], None]: Words the letter made, None if the letter isn't placed
+        """
+        player: Player = self.get_player(player)
+        if (
+            not player
+            or not (0 <= x < self.grid_size and 0 <= y < self.grid_size)
+            or not player.has_letter(letter)
+            or not player.can_play
+        ):
+            return None
+
+        # make sure the initial letters of the chunk are there before looking at the cell
+        self.get_chunks([self.board.get_chunk_key(x, y)])
+        if self.board.get(x, y):
+            return None
+
+        self.board.set(x, y, letter)
+        self.last_move = (x, y)
+        self._record_event(
+            GameEventType.LETTER_PLACED, {"x": x, "y": y, "player": player.name, "letter": letter}
+        )
+
+        if words := self.find_words(x, y):
+            self._add_score(player.name, words)
+            self._record_event(GameEventType.WORDS_MADE, {"player": player.name, "words": words})
+        return words
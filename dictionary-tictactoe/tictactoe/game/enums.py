@@ -12,6 +12,7 @@ class PlayerState(BaseIntEnum):
     JOINED = 0
     DISCONNECTED = 1
     STEAL_PALETTE = 2
+    RECONNECTED = 3
 
 
 class RoomState(BaseIntEnum):
@@ -25,7 +26,27 @@ class RoomState(BaseIntEnum):
 class GameStateEnum(BaseIntEnum):
     GAME_STATE_SYNC = 100
     PALETTE_SYNC = 200
+    VIEWPORT_SUBSCRIBE = 300
+    CHUNK_SYNC = 400
+    CELL_SYNC = 500
+    WORD_SYNC = 600
 
 
 class GameTasks(BaseIntEnum):
     PALETTE_TASK = 1000
+    BOT_JOIN_TASK = 1001
+    BOT_MOVE_TASK = 1002
+
+
+class GameEventType(BaseIntEnum):
+    GAME_CREATED = 2000
+    GAME_RESET = 2001
+    ROOM_STATE_CHANGED = 2002
+    PLAYER_JOINED = 2003
+    PLAYER_LEFT = 2004
+    LETTER_PLACED = 2005
+    PALETTE_STOLEN = 2006
+    PALETTES_CHANGED = 2007
+    CHUNK_CREATED = 2008
+    PLAYER_RECONNECTED = 2009
+    WORDS_MADE = 2010
@@ -1,32 +1,198 @@
-from typing import List, Literal, Union
+import random
+import sys
+from typing import Dict, Iterable, List, Literal, Union
 
+from tictactoe.util.generator import generate_seat_palettes, get_ready_grid, get_rng
 from tictactoe.util.matrix import create_grid, get_cols, get_rows
-from tictactoe.util.palette import check_if_word, generate_random_palette
+from tictactoe.util.palette import check_if_word, generate_random_palette, get_letter_distribution
 
-from .enums import RoomState
-from .player import Player
+from .enums import GameEventType, RoomState
+from .player import Bot, Player
 
 
 class Game:
+    # a worker holds tens of thousands of rooms, slots keep every game without a __dict__
+    __slots__ = (
+        "room_group_name",
+        "word_size",
+        "palette_size",
+        "grid_size",
+        "palette_change_cooldown",
+        "max_players",
+        "seed",
+        "game_state",
+        "seat_palettes",
+        "room_state",
+        "players",
+        "seq",
+        "pending_events",
+    )
+    # the palettes of all players are sent to the whole room when they change
+    shares_palettes = True
+
     def __init__(
         self,
         grid_size: int = 10,
         palette_change_cooldown: int = 10,
         palette_size: int = 10,
         word_size: int = 5,
+        max_players: int = 2,
         room_group_name: str = None,
+        seed: int = None,
     ) -> None:
         self.room_group_name = room_group_name
         self.word_size = word_size
         self.palette_size = palette_size
         self.grid_size = grid_size
         self.palette_change_cooldown = palette_change_cooldown
-        self.game_state = create_grid(self.grid_size, self.grid_size)
+        self.max_players = max_players
+        # palettes of the seats that aren't taken yet, they only fit the grid the game starts with
+        self.seat_palettes: List[str] = []
+        self._create_board(seed)
         self.room_state = RoomState.IN_LOBBY
-        self.players = []
+        # players keyed by their names, the order of the dict is the order of the seats
+        self.players: Dict[str, Player] = {}
+        # sequence number of the last recorded event and the events that aren't persisted yet
+        self.seq = 0
+        self.pending_events = []
+        self._record_event(GameEventType.GAME_CREATED, self._get_created_event_data())
+
+    def _create_board(self, seed: Union[int, None]) -> None:
+        # everything random in the game is generated from its seed, see get_random
+        if seed is None:
+            self.seed, self.game_state, self.seat_palettes = get_ready_grid(
+                self.grid_size, self.palette_size, self.max_players
+            )
+        else:
+            self.seed = seed
+            self.game_state = create_grid(self.grid_size, self.grid_size, rng=get_rng(seed, 0))
+            self.seat_palettes = generate_seat_palettes(
+                seed, self.game_state, self.palette_size, self.max_players
+            )
+
+    def _get_created_event_data(self) -> dict:
+        # the arguments replay passes to the class, and the grid the game starts with
+        return {
+            "grid_size": self.grid_size,
+            "palette_change_cooldown": self.palette_change_cooldown,
+            "palette_size": self.palette_size,
+            "word_size": self.word_size,
+            "max_players": self.max_players,
+            "seed": self.seed,
+            "game_state": self._copy_game_state(),
+        }
+
+    @classmethod
+    def replay(cls, events: Iterable[dict], until_seq: int = None) -> "Game":
+        """Rebuilds a game from its event log
+
+        Args:
+            events (Iterable[dict]): Events ordered by their seq, starting from the GAME_CREATED event
+            until_seq (int, optional): Last seq to apply, applies all of the events if None
+
+        Returns:
+            Game: Game as it was right after the event with `until_seq` is applied
+        """
+        game = None
+        for event in events:
+            if until_seq is not None and event["seq"] > until_seq:
+                break
+
+            if event["type"] == GameEventType.GAME_CREATED:
+                data = dict(event["data"])
+                game_state = data.pop("game_state", None)
+                game = cls(**data)
+                if game_state is not None:
+                    game.game_state = [list(row) for row in game_state]
+                game.pending_events = []
+            else:
+                game.apply_event(event)
+            game.seq = event["seq"]
+
+        return game
+
+    def apply_event(self, event: dict) -> None:
+        """Applies a recorded event to the game without recording it again
+
+        Args:
+            event (dict): Event that is created by self._record_event
+        """
+        data = event["data"]
+        match event["type"]:
+            case GameEventType.GAME_RESET:
+                self.game_state = [list(row) for row in data["game_state"]]
+                self.seat_palettes = []
+            case GameEventType.ROOM_STATE_CHANGED:
+                self.room_state = RoomState(data["room_state"])
+            case GameEventType.PLAYER_JOINED:
+                player_class = Bot if data.get("is_bot") else Player
+                player = player_class(
+                    data["name"], list(data["palette"]), rating_id=data.get("rating_id")
+                )
+                self.players[player.name] = player
+                # the seat is taken, the next player gets the palette of the next one
+                if self.seat_palettes:
+                    self.seat_palettes.pop(0)
+            case GameEventType.PLAYER_LEFT:
+                self.players.pop(data["name"], None)
+            case GameEventType.PLAYER_RECONNECTED:
+                self._rename_player(data["name"], data["new_name"])
+            case GameEventType.LETTER_PLACED:
+                self.game_state[data["x"]][data["y"]] = data["letter"]
+            case GameEventType.PALETTE_STOLEN:
+                thief = self.get_player(data["thief"])
+                victim = self.get_player(data["victim"])
+                thief.add_to_palette(victim.palette)
+                thief.steal_amount -= 1
+                victim.palette = []
+                victim.can_play = False
+            case GameEventType.PALETTES_CHANGED:
+                for name, palette in data["palettes"].items():
+                    self.get_player(name).reset_palette(list(palette))
+
+    def pop_pending_events(self) -> List[dict]:
+        """Returns the events that aren't persisted yet and clears them from the game
+
+        Returns:
+            List[dict]: Events ordered by their seq
+        """
+        events, self.pending_events = self.pending_events, []
+        return events
+
+    def _record_event(self, event_type: GameEventType, data: dict) -> None:
+        self.seq += 1
+        self.pending_events.append({"seq": self.seq, "type": event_type, "data": data})
+
+    def get_random(self) -> random.Random:
+        """Returns the generator of the game for its current seq,
+        the game makes the same grids and palettes when it's played again on its seed"""
+        return get_rng(self.seed, self.seq)
+
+    def _copy_game_state(self) -> List[List[str]]:
+        return [row[:] for row in self.game_state]
+
+    def get_size(self) -> int:
+        """Approximates the memory used by the game, single letter strings are shared
+        by the interpreter so only the containers are counted
+
+        Returns:
+            int: Size of the game, its grid, players and pending events in bytes
+        """
+        size = sys.getsizeof(self) + self._get_board_size()
+        size += sys.getsizeof(self.seat_palettes)
+        size += sum(sys.getsizeof(palette) for palette in self.seat_palettes)
+        size += sys.getsizeof(self.players)
+        size += sum(player.get_size() for player in self.players.values())
+        size += sys.getsizeof(self.pending_events)
+        for event in self.pending_events:
+            size += sys.getsizeof(event) + sys.getsizeof(event["data"])
+        return size
+
+    def _get_board_size(self) -> int:
+        return sys.getsizeof(self.game_state) + sum(sys.getsizeof(row) for row in self.game_state)
 
     def to_json(self) -> dict:
-        return {"game_state": self.game_state, "players": self.get_players()}
+        return {"game_state": self.game_state, "players": self.get_players(), "seq": self.seq}
 
     def change_room_state(
         self,
@@ -43,17 +209,27 @@ class Game:
         Args:
             state (Literal[ RoomState.IN_LOBBY, RoomState.GAME_IN_PROGRESS, RoomState.GAME_ENDED, RoomState.GAME_ABORTED, ]): State of the room that you want to self.room_state to be in
         """
+        if self.room_state == state:
+            return
+
         self.room_state = state
+        self._record_event(GameEventType.ROOM_STATE_CHANGED, {"room_state": state})
+
+    def can_join(self) -> bool:
+        return self.room_state in [RoomState.IN_LOBBY, RoomState.GAME_ENDED]
 
     def reset_game_state(self) -> None:
         """Resets game state back to it's original state"""
-        self.game_state = create_grid(self.grid_size, self.grid_size)
+        self.game_state = create_grid(self.grid_size, self.grid_size, rng=self.get_random())
+        self.seat_palettes = []
+        self._record_event(GameEventType.GAME_RESET, {"game_state": self._copy_game_state()})
 
-    def create_player(self, name: str) -> Player:
+    def create_player(self, name: str, player_class: type = Player) -> Player:
         """Create and adds the player to the player list and returns the added player dict
 
         Args:
             name (str): Player id for the newly created player
+            player_class (type, optional): Player or Bot. Defaults to Player.
 
         Returns:
             Player: Added player
@@ -62,14 +238,34 @@ class Game:
         if self.room_state == RoomState.GAME_IN_PROGRESS:
             return
 
-        player = Player(name, generate_random_palette(self.palette_size))
-        self.players.append(player)
+        if name in self.players or len(self.players) >= self.max_players:
+            return
 
-        if len(self.players) == 2:
+        # the palettes of a new game are generated with its grid, see get_ready_grid
+        if self.seat_palettes:
+            palette = self.seat_palettes.pop(0)
+        else:
+            palette = generate_random_palette(self.palette_size, self.game_state, self.get_random())
+        player = player_class(name, palette)
+        self._add_player(player)
+
+        if len(self.players) == self.max_players:
             self.change_room_state(RoomState.GAME_IN_PROGRESS)
 
         return player
 
+    def _add_player(self, player: Player) -> None:
+        self.players[player.name] = player
+        self._record_event(
+            GameEventType.PLAYER_JOINED,
+            {
+                "name": player.name,
+                "palette": list(player.palette),
+                "is_bot": player.is_bot,
+                "rating_id": player.rating_id,
+            },
+        )
+
     def remove_player(self, name: str) -> Union[Player, None]:
         """Removes given name from self.players list, and changes the room_state accordingly
 
@@ -78,14 +274,15 @@ class Game:
         Returns:
             Player: Removed player
         """
-        if not (player := self.get_player(name)):
+        if not (player := self.players.pop(name, None)):
             return
 
-        self.players.remove(player)
+        self._record_event(GameEventType.PLAYER_LEFT, {"name": player.name})
 
         if len(self.players) == 0:
             self.change_room_state(RoomState.GAME_ABORTED)
-        else:
+        # a larger room keeps going as long as there is somebody to play against
+        elif self.room_state != RoomState.GAME_IN_PROGRESS or len(self.players) < 2:
             # reset the game state and put the game state back in lobby
             # if a player is removed from the game
             # TODO: maybe not reset the game state and continue from there?
@@ -94,6 +291,32 @@ class Game:
 
         return player
 
+    def reconnect_player(self, name: str, new_name: str) -> Union[Player, None]:
+        """Moves the player to the name of its new connection, keeping its seat and palette
+
+        Args:
+            name (str): Name of the player on its old connection
+            new_name (str): Name of the player on its new connection
+
+        Returns:
+            Union[Player, None]: Reconnected player, None if there is no such player
+        """
+        if name not in self.players or new_name in self.players:
+            return None
+
+        player = self._rename_player(name, new_name)
+        self._record_event(GameEventType.PLAYER_RECONNECTED, {"name": name, "new_name": new_name})
+        return player
+
+    def _rename_player(self, name: str, new_name: str) -> Player:
+        player = self.players[name]
+        player.name = new_name
+        # rebuilt instead of popped and added again, the player keeps its seat
+        self.players = {
+            new_name if key == name else key: value for key, value in self.players.items()
+        }
+        return player
+
     def get_player(self, name: str) -> Union[Player, None]:
         """Gets the player with given `name`
 
@@ -103,15 +326,43 @@ class Game:
         Returns:
             Union[Player, None]: Player or None, based on the name
         """
-        return next((x for x in self.players if name == x.name), None)
+        return self.players.get(name)
+
+    def get_players(self, names: Iterable[str] = None) -> List[dict]:
+        """Serializes and returns the players as json list
 
-    def get_players(self) -> List[dict]:
-        """Serializes and returns all the players as json list
+        Args:
+            names (Iterable[str], optional): Names of the players to serialize,
+                all of the players in the order of their seats if None
 
         Returns:
             List[dict]: List of players
         """
-        return [player.to_json() for player in self.players]
+        if names is None:
+            return [player.to_json() for player in self.players.values()]
+        return [player.to_json() for name in names if (player := self.players.get(name))]
+
+    def get_steal_target(self, thief_name: str) -> Union[Player, None]:
+        """Picks the opponent to steal from when the thief doesn't name one,
+        the opponent with the largest palette, the closest seat after the thief on ties
+
+        Args:
+            thief_name (str): Name of the player that's stealing
+
+        Returns:
+            Union[Player, None]: Opponent to steal from, None if nobody has a palette
+        """
+        seats = list(self.players)
+        if thief_name not in seats:
+            return None
+
+        start = seats.index(thief_name)
+        opponents = [self.players[name] for name in seats[start + 1 :] + seats[:start]]
+        return max(
+            (player for player in opponents if player.palette_length),
+            key=lambda player: player.palette_length,
+            default=None,
+        )
 
     def check_for_game_finish(self) -> bool:
         """Checks if the game is over
@@ -161,20 +412,46 @@ class Game:
         if (
             not player
             or self.game_state[x][y]
-            or not (letter in player.palette)
+            or not player.has_letter(letter)
             or not player.can_play
         ):
             return False
 
         # else put the letter
         self.game_state[x][y] = letter
+        self._record_event(
+            GameEventType.LETTER_PLACED, {"x": x, "y": y, "player": player.name, "letter": letter}
+        )
         return True
 
-    def steal_palette(self, thief_name: str, victim_name: str) -> bool:
+    def steal_palette(self, thief_name: str, victim_name: str = None, now: int = None) -> bool:
         thief = self.get_player(thief_name)
-        victim = self.get_player(victim_name)
+        if victim_name is None:
+            victim = self.get_steal_target(thief_name)
+        else:
+            victim = self.get_player(victim_name)
 
-        if not thief or not victim or not thief.can_play:
+        if not thief or not victim or victim is thief or not thief.can_play:
             return False
 
-        return thief.steal_palette(victim)
+        if is_stolen := thief.steal_palette(victim, now):
+            self._record_event(
+                GameEventType.PALETTE_STOLEN, {"thief": thief.name, "victim": victim.name}
+            )
+
+        return is_stolen
+
+    def rotate_palettes(self) -> None:
+        """Gives every player a new random palette"""
+        rng = self.get_random()
+        # every palette is weighted by the same grid, so it's only scanned once
+        weights = get_letter_distribution().get_weights(self.game_state)
+        for player in self.players.values():
+            player.reset_palette(
+                generate_random_palette(self.palette_size, rng=rng, weights=weights)
+            )
+
+        self._record_event(
+            GameEventType.PALETTES_CHANGED,
+            {"palettes": {player.name: list(player.palette) for player in self.players.values()}},
+        )
@@ -1,21 +1,80 @@
+import sys
 import time
-from typing import List
+from typing import Iterable, List, Union
+
+
+def _now() -> int:
+    return time.monotonic_ns() // 1_000_000
 
 
 class Player:
+    """Player of a room, slotted since a worker holds one for every seat of every room
+
+    The palette is kept as ASCII bytes, one byte per letter, the `palette` property
+    converts it from and to the list of letters the rest of the game works with.
+    """
+
+    __slots__ = (
+        "name",
+        "_palette",
+        "can_play",
+        "steal_timer",
+        "steal_amount",
+        "steal_cooldown",
+        "rating_id",
+    )
+    is_bot = False
+
     def __init__(
-        self, name: str, palette: list, steal_amount: int = 5, steal_cooldown: int = 10, **options
+        self,
+        name: str,
+        palette: Iterable[str],
+        steal_amount: int = 5,
+        steal_cooldown: int = 10,
+        rating_id: str = None,
+        **options,
     ) -> None:
         self.name = name
         self.palette = palette
         self.can_play = True
-        self.steal_timer = time.time()
+        # milliseconds of the monotonic clock, changes of the wall clock can't affect the cooldown
+        self.steal_timer = _now()
         self.steal_amount = steal_amount
         self.steal_cooldown = steal_cooldown  # in seconds
+        # the name is the channel of the connection, the player is rated under this id instead.
+        # None for the players that aren't rated, like the bots
+        self.rating_id = rating_id
 
     def __eq__(self, __o: object) -> bool:
         return __o.name == self.name
 
+    @property
+    def palette(self) -> List[str]:
+        return list(self._palette.decode("ascii"))
+
+    @palette.setter
+    def palette(self, palette: Union[Iterable[str], bytes]) -> None:
+        if not isinstance(palette, bytes):
+            palette = "".join(palette).encode("ascii")
+        self._palette = palette
+
+    @property
+    def palette_length(self) -> int:
+        return len(self._palette)
+
+    def has_letter(self, letter: str) -> bool:
+        # the letter comes from the client, anything that isn't ascii can't be in the palette
+        return (
+            isinstance(letter, str)
+            and len(letter) == 1
+            and letter.isascii()
+            and ord(letter) in self._palette
+        )
+
+    def get_size(self) -> int:
+        """Size of the player and its palette in bytes, the name is shared with the channel"""
+        return sys.getsizeof(self) + sys.getsizeof(self._palette)
+
     def to_json(self) -> str:
         return {
             "name": self.name,
@@ -23,31 +82,51 @@ class Player:
             "can_play": self.can_play,
             "steal_amount": self.steal_amount,
             "steal_cooldown": self.steal_cooldown,
+            "is_bot": self.is_bot,
         }
 
-    def add_to_palette(self, palette: List[str]) -> None:
-        self.palette += palette
+    def add_to_palette(self, palette: Union[Iterable[str], bytes]) -> None:
+        if not isinstance(palette, bytes):
+            palette = "".join(palette).encode("ascii")
+        self._palette += palette
 
     def reset_palette(self, palette: List[str] = None) -> None:
-        self.palette = palette
+        self.palette = palette or []
         self.can_play = True
 
-    def can_steal(self) -> bool:
-        # initial lock timer + cooldown needs to be less than the current time,
-        # that means at least cooldown seconds elapsed between last lock
+    def can_steal(self, now: int = None) -> bool:
+        """Checks the steal cooldown and the steals that are left, and uses up a steal if it can
+
+        Args:
+            now (int, optional): Milliseconds of the monotonic clock, read from the clock if None
+
+        Returns:
+            bool: Whether the player can steal right now
+        """
+        if now is None:
+            now = _now()
+
+        # at least cooldown seconds need to be elapsed since the last steal
         if can_steal := (
-            self.steal_amount > 0 and self.steal_timer + self.steal_cooldown < time.time()
+            self.steal_amount > 0 and self.steal_timer + self.steal_cooldown * 1000 < now
         ):
-            self.steal_timer = time.time()
+            self.steal_timer = now
             self.steal_amount -= 1
 
         return can_steal
 
-    def steal_palette(self, victim: "Player") -> bool:
+    def steal_palette(self, victim: "Player", now: int = None) -> bool:
 
-        if can_steal := self.can_steal():
-            self.add_to_palette(victim.palette)
-            victim.palette = []
+        if can_steal := self.can_steal(now):
+            self.add_to_palette(victim._palette)
+            victim.palette = b""
             victim.can_play = False
 
         return can_steal
+
+
+class Bot(Player):
+    """Player that is controlled by the server, its moves are picked by tictactoe.util.solver"""
+
+    __slots__ = ()
+    is_bot = True
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Callable
+
+from tictactoe.game import Game
+
+
+class RoomActor:
+    """Owns the `Game` of a single room and runs every mutation of it through a mailbox.
+
+    Commands are plain synchronous callables that receive the game as their first argument,
+    so a command can never be interleaved with another one at an `await` point.
+    The runner drains the mailbox in batches, which keeps the ordering of the commands
+    deterministic without blocking the other rooms on the event loop.
+    """
+
+    def __init__(self, game: Game, max_batch_size: int = 64) -> None:
+        self.game = game
+        self.max_batch_size = max_batch_size
+        self._mailbox = asyncio.Queue()
+        self._runner = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._runner is not None and not self._runner.done()
+
+    def start(self) -> None:
+        """Starts the runner of the actor if it isn't running already"""
+        if not self.is_running:
+            self._runner = asyncio.get_event_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        """Stops the runner and cancels the commands that are still waiting in the mailbox"""
+        if self.is_running:
+            self._runner.cancel()
+        self._runner = None
+
+        while not self._mailbox.empty():
+            _, _, future = self._mailbox.get_nowait()
+            future.cancel()
+
+    async def ask(self, command: Callable[..., Any], *args) -> Any:
+        """Puts the command into the mailbox and waits for its result
+
+        Args:
+            command (Callable[..., Any]): Callable that gets the game as its first argument
+            *args: Rest of the arguments passed to the command
+
+        Returns:
+            Any: Whatever the command returns, exceptions raised by the command are re-raised
+        """
+        self.start()
+        future = asyncio.get_event_loop().create_future()
+        self._mailbox.put_nowait((command, args, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._mailbox.get()]
+            while len(batch) < self.max_batch_size and not self._mailbox.empty():
+                batch.append(self._mailbox.get_nowait())
+
+            for command, args, future in batch:
+                # the caller might've been cancelled while the command was waiting
+                if future.done():
+                    continue
+                try:
+                    future.set_result(command(self.game, *args))
+                except Exception as e:
+                    future.set_exception(e)
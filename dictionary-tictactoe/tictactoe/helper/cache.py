@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Union
+
+
+class ModelCache:
+    """Bounded, thread safe LRU cache for model instances that records its hit rate
+
+    The db calls run on the threads of the db pool, so the cache can be written
+    from those threads while it's read on the event loop. The rows can be deleted by
+    other processes like the archive_games command, so the entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_size: int, ttl: float = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Union[Any, None]:
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+
+            value, expires_at = self._items[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._items[key]
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,68 @@
+import json
+import time
+import zlib
+
+from django.conf import settings
+
+# frames and bytes that went through encode_frame on this worker, and the time spent compressing
+_compression_stats = {
+    "frames": 0,
+    "compressed_frames": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "compress_seconds": 0.0,
+}
+
+
+def get_compression_stats() -> dict:
+    """Returns how much the websocket frames are compressed and what it costs
+
+    Returns:
+        dict: Frames sent, frames that are compressed, their size before and after
+            and the average milliseconds a compression takes
+    """
+    stats = dict(_compression_stats)
+    compressed = stats["compressed_frames"]
+    compress_seconds = stats.pop("compress_seconds")
+    stats["ratio"] = stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 1.0
+    stats["compress_ms_avg"] = compress_seconds * 1000 / compressed if compressed else 0.0
+    return stats
+
+
+def encode_frame(content: dict) -> dict:
+    """Serializes the content of a websocket frame, the frames that are at least
+    WS_COMPRESSION_MIN_SIZE long are compressed with zlib into a binary frame
+
+    Every frame is compressed on its own, so a broadcast is compressed once
+    and the same bytes are sent to every channel of the group.
+
+    Args:
+        content (dict): Json content of the frame
+
+    Returns:
+        dict: text_data or bytes_data keyword argument of AsyncWebsocketConsumer.send
+    """
+    text = json.dumps(content)
+    _compression_stats["frames"] += 1
+    if settings.WS_COMPRESSION_MIN_SIZE is None or len(text) < settings.WS_COMPRESSION_MIN_SIZE:
+        return {"text_data": text}
+
+    data = text.encode()
+    started = time.perf_counter()
+    compressed = zlib.compress(data, settings.WS_COMPRESSION_LEVEL)
+    _compression_stats["compress_seconds"] += time.perf_counter() - started
+    _compression_stats["compressed_frames"] += 1
+    _compression_stats["bytes_in"] += len(data)
+    _compression_stats["bytes_out"] += len(compressed)
+    return {"bytes_data": compressed}
+
+
+class CompressedFramesMixin:
+    """Sends the json frames of a consumer through encode_frame, the frames that are
+    encoded once for a whole group by GameManagerMixin.group_send_frame arrive at send_frame"""
+
+    async def send_json(self, content: dict, close: bool = False) -> None:
+        await self.send(**encode_frame(content), close=close)
+
+    async def send_frame(self, payload: dict) -> None:
+        await self.send(text_data=payload.get("text_data"), bytes_data=payload.get("bytes_data"))
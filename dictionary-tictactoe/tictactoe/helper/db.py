@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+# every thread of the pool keeps its own connection open for settings.DATABASES CONN_MAX_AGE,
+# so the pool size is also the max number of connections a worker opens
+_db_executor = None
+_pool_lock = threading.Lock()
+_pool_stats = {"calls": 0, "waiting": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=settings.DB_POOL_SIZE, thread_name_prefix="db-pool"
+        )
+    return _db_executor
+
+
+def get_db_pool_stats() -> dict:
+    """Returns how long the db calls waited for a connection of the pool
+
+    Returns:
+        dict: Pool size, number of calls, calls that are waiting right now
+            and the average and max wait in seconds
+    """
+    with _pool_lock:
+        calls = _pool_stats["calls"]
+        return {
+            "size": settings.DB_POOL_SIZE,
+            "calls": calls,
+            "waiting": _pool_stats["waiting"],
+            "wait_avg": _pool_stats["wait_total"] / calls if calls else 0.0,
+            "wait_max": _pool_stats["wait_max"],
+        }
+
+
+def database_pool_to_async(func: Callable) -> Callable:
+    """Runs the decorated sync db function on the bounded db pool,
+    like channels.db.database_sync_to_async but without a new connection for every call"""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        submitted = time.perf_counter()
+        waiting = True
+        with _pool_lock:
+            _pool_stats["waiting"] += 1
+
+        def stop_waiting() -> bool:
+            # the call stops waiting either when it starts running or when its caller gives up,
+            # whichever comes first
+            nonlocal waiting
+            with _pool_lock:
+                if not waiting:
+                    return False
+                waiting = False
+                _pool_stats["waiting"] -= 1
+                return True
+
+        def run():
+            wait = time.perf_counter() - submitted
+            stop_waiting()
+            with _pool_lock:
+                _pool_stats["calls"] += 1
+                _pool_stats["wait_total"] += wait
+                _pool_stats["wait_max"] = max(_pool_stats["wait_max"], wait)
+
+            # only closes the connection of this thread if it's broken or older than CONN_MAX_AGE
+            close_old_connections()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                close_old_connections()
+
+        try:
+            return await asyncio.get_event_loop().run_in_executor(_get_db_executor(), run)
+        finally:
+            stop_waiting()
+
+    return wrapper
@@ -0,0 +1,11 @@
+# state of the worker process, a draining worker doesn't take new players
+# and reports itself as not ready so the load balancer stops sending traffic to it
+_server_state = {"draining": False}
+
+
+def start_draining() -> None:
+    _server_state["draining"] = True
+
+
+def is_draining() -> bool:
+    return _server_state["draining"]
@@ -0,0 +1,240 @@
+import heapq
+import threading
+import uuid
+from typing import Dict, Iterator, List, Tuple, Union
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from tictactoe.models import GameHistoryModel, GameModel, RatingModel
+from tictactoe.util.rating import Leaderboard, rate_game
+
+# the leaderboard of the worker, loaded from RatingModel on first use.
+# every worker updates its own copy with the games it finishes, the db is the source of truth
+_leaderboard = None
+_games_played: Dict[str, int] = {}
+# names of the players whose ratings changed since the last flush
+_pending = set()
+_lock = threading.RLock()
+_RATING_ID_SALT = "tictactoe.rating_id"
+
+
+def get_rating_id(token: str = None) -> Tuple[str, str]:
+    """Returns the id a player is rated under, and the signed token of it the client
+    keeps to be rated under the same id on its next connection. The names of the players
+    are the channels of their connections, so they can't be used for the ratings.
+
+    Args:
+        token (str, optional): Token the client got before. Defaults to None.
+
+    Returns:
+        Tuple[str, str]: Rating id and its token, a new id if the token isn't valid
+    """
+    if token and (rating_id := read_rating_id(token)):
+        return rating_id, token
+
+    rating_id = uuid.uuid4().hex
+    return rating_id, signing.dumps(rating_id, salt=_RATING_ID_SALT)
+
+
+def read_rating_id(token: str) -> Union[str, None]:
+    """Reads the rating id out of a token made by get_rating_id
+
+    Args:
+        token (str): Signed token of the rating id
+
+    Returns:
+        Union[str, None]: Rating id, None if the token isn't valid
+    """
+    try:
+        return signing.loads(token, salt=_RATING_ID_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def _load_leaderboard() -> Leaderboard:
+    leaderboard = Leaderboard(settings.RATING_MAX)
+    ratings = RatingModel.objects.values_list("name", "rating", "games")
+    for name, rating, games in ratings.iterator(chunk_size=settings.RATING_BATCH_SIZE):
+        leaderboard.set(name, rating)
+        _games_played[name] = games
+    return leaderboard
+
+
+def get_leaderboard() -> Leaderboard:
+    """Returns the leaderboard of the worker, queries the db the first time it's called"""
+    global _leaderboard
+    with _lock:
+        if _leaderboard is None:
+            _leaderboard = _load_leaderboard()
+        return _leaderboard
+
+
+def read_leaderboard(amount: int, rating_id: str = None) -> dict:
+    """Reads the top of the leaderboard and the rank of a player while no db thread changes it
+
+    Args:
+        amount (int): Number of players from the top
+        rating_id (str, optional): Rating id of a player to rank. Defaults to None.
+
+    Returns:
+        dict: Number of rated players, the top players and the player if it's asked for
+    """
+    with _lock:
+        leaderboard = get_leaderboard()
+        response = {
+            "players": len(leaderboard),
+            "top": [
+                {"rank": rank, "name": name, "rating": round(rating)}
+                for rank, name, rating in leaderboard.get_top(amount)
+            ],
+        }
+        if rating_id:
+            rating = leaderboard.get(rating_id)
+            response["player"] = {
+                "name": rating_id,
+                "rank": leaderboard.get_rank(rating_id),
+                "rating": round(rating) if rating is not None else None,
+            }
+        return response
+
+
+def record_game_result(winner: Union[str, None], players: List[str]) -> Dict[str, float]:
+    """Updates the ratings of the players of a finished game,
+    the ratings are written to the db in batches by flush_ratings
+
+    Args:
+        winner (Union[str, None]): Rating id of the player that won, None if it isn't rated
+        players (List[str]): Rating ids of the rated players in the game, including the winner
+
+    Returns:
+        Dict[str, float]: New ratings of the players
+    """
+    with _lock:
+        leaderboard = get_leaderboard()
+        ratings = rate_game(leaderboard.ratings, winner, players, settings.RATING_K_FACTOR)
+        for name, rating in ratings.items():
+            leaderboard.set(name, rating)
+            _games_played[name] = _games_played.get(name, 0) + 1
+        _pending.update(ratings)
+        return ratings
+
+
+def flush_ratings(force: bool = False) -> int:
+    """Writes the changed ratings to the db once there are RATING_BATCH_SIZE of them
+
+    Args:
+        force (bool, optional): Writes whatever is pending. Defaults to False.
+
+    Returns:
+        int: Number of ratings that are written
+    """
+    with _lock:
+        if not _pending or (not force and len(_pending) < settings.RATING_BATCH_SIZE):
+            return 0
+
+        names = list(_pending)
+        _pending.clear()
+        rows = {name: (_leaderboard.get(name), _games_played.get(name, 0)) for name in names}
+
+    with transaction.atomic():
+        existing = RatingModel.objects.in_bulk(names, field_name="name")
+        for name, model in existing.items():
+            model.rating, model.games = rows[name]
+        RatingModel.objects.bulk_update(
+            existing.values(), ["rating", "games"], batch_size=settings.RATING_BATCH_SIZE
+        )
+        RatingModel.objects.bulk_create(
+            [
+                RatingModel(name=name, rating=rating, games=games)
+                for name, (rating, games) in rows.items()
+                if name not in existing
+            ],
+            batch_size=settings.RATING_BATCH_SIZE,
+        )
+
+    return len(names)
+
+
+def _get_rated_ids(winner: str, rated_players: Union[Dict[str, str], list]) -> Tuple[str, list]:
+    # the games archived before the rating ids list the names of their players
+    if isinstance(rated_players, list):
+        rated_players = {name: name for name in rated_players}
+    # a reconnected player is in the game under the names of both of its connections
+    return rated_players.get(winner), list(dict.fromkeys(rated_players.values()))
+
+
+def _iter_results() -> Iterator[Tuple[object, str, List[str]]]:
+    """Yields the finish time, and the rating ids of the winner and of the rated players
+    of every won game, oldest first. The archived and the live games are both ordered by time,
+    so they are merged as streams."""
+    history = (
+        (game.finished_at, *_get_rated_ids(game.winner, game.rated_players))
+        for game in GameHistoryModel.objects.filter(winner__isnull=False)
+        .only("finished_at", "winner", "rated_players")
+        .order_by("finished_at")
+        .iterator(chunk_size=settings.RATING_BATCH_SIZE)
+    )
+    return heapq.merge(history, _iter_live_results(), key=lambda result: result[0])
+
+
+def _iter_live_results() -> Iterator[Tuple[object, str, List[str]]]:
+    # prefetch_related doesn't work with iterator(), so the players are queried per batch
+    games = (
+        GameModel.objects.filter(winner__isnull=False)
+        .order_by("updated_at")
+        .values_list("room_uuid", "updated_at", "winner")
+    )
+    batch = []
+    for game in games.iterator(chunk_size=settings.RATING_BATCH_SIZE):
+        batch.append(game)
+        if len(batch) == settings.RATING_BATCH_SIZE:
+            yield from _with_players(batch)
+            batch = []
+    yield from _with_players(batch)
+
+
+def _with_players(games: List[tuple]) -> Iterator[Tuple[object, str, List[str]]]:
+    players = {}
+    for room_uuid, name, rating_id in GameModel.players.through.objects.filter(
+        gamemodel_id__in=[game[0] for game in games], playermodel__rating_id__isnull=False
+    ).values_list("gamemodel_id", "playermodel__name", "playermodel__rating_id"):
+        players.setdefault(room_uuid, {})[name] = rating_id
+
+    for room_uuid, updated_at, winner in games:
+        yield updated_at, *_get_rated_ids(winner, players.get(room_uuid, {}))
+
+
+def rebuild_leaderboard() -> int:
+    """Replays every won game into a new leaderboard and replaces the saved ratings with it
+
+    Returns:
+        int: Number of rated players
+    """
+    global _leaderboard
+    leaderboard = Leaderboard(settings.RATING_MAX)
+    games_played = {}
+    for _, winner, players in _iter_results():
+        for name, rating in rate_game(
+            leaderboard.ratings, winner, players, settings.RATING_K_FACTOR
+        ).items():
+            leaderboard.set(name, rating)
+            games_played[name] = games_played.get(name, 0) + 1
+
+    with transaction.atomic():
+        RatingModel.objects.all().delete()
+        RatingModel.objects.bulk_create(
+            [
+                RatingModel(name=name, rating=rating, games=games_played[name])
+                for name, rating in leaderboard.ratings.items()
+            ],
+            batch_size=settings.RATING_BATCH_SIZE,
+        )
+
+    with _lock:
+        _leaderboard = leaderboard
+        _games_played.clear()
+        _games_played.update(games_played)
+        _pending.clear()
+
+    return len(leaderboard)
@@ -1,53 +1,227 @@
 import asyncio
-from typing import Callable, List, Literal, Tuple, Union
-
-from channels.db import database_sync_to_async
+import functools
+import multiprocessing
+import secrets
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Literal, Tuple, Union
+
+from django.conf import settings
+from django.db.utils import IntegrityError
 from strenum import StrEnum
-from tictactoe.game import Game, GameTasks, Player, RoomState
-from tictactoe.models import GameModel, PlayerModel
-from tictactoe.util.palette import generate_random_palette
-
+from tictactoe.game import Bot, Game, GameStateEnum, GameTasks, LargeGame, Player, RoomState
+from tictactoe.models import GameEventModel, GameHistoryModel, GameModel, PlayerModel
+from tictactoe.util.generator import fill_grid_pools
+from tictactoe.util.solver import find_best_move
+
+from .actor import RoomActor
+from .cache import ModelCache
+from .compression import encode_frame
+from .db import database_pool_to_async
+from .leaderboard import flush_ratings, record_game_result
 from .wrappers import cancel_tasks_on_room_state_change
 
 # TODO, maybe find a better way to store in-memory tasks and games?
 # redis?
-_games = {}
+# games are ordered from the least to the most recently used one
+_games = OrderedDict()
 _tasks = []
+_room_sweeper = None
+# read-through cache of the game models of the rooms that aren't in memory, keyed by room
+_game_model_cache = ModelCache(settings.MODEL_CACHE_SIZE, settings.MODEL_CACHE_TTL)
+# bot moves are searched in worker processes so they never block the event loop
+_bot_executor = None
+# session token to the room and the name of its player, and the timer that holds the seat
+# of a player that is disconnected. Player names are kept to their tokens to drop them on leave,
+# and the rooms to their tokens to drop them with the room.
+_sessions = {}
+_session_tokens = {}
+_room_sessions: Dict[str, set] = {}
+# size and states of the resident rooms, collected on the event loop by the room sweeper.
+# the health endpoints run on other threads, so they read this instead of iterating _games
+_room_stats = {"bytes": 0, "states": {}}
+
+
+def get_model_cache_stats() -> dict:
+    return {
+        "game_models": _game_model_cache.get_stats(),
+    }
+
+
+def get_room_stats() -> dict:
+    """Counts the rooms that are kept in the memory of this process, safe to call from any thread
+
+    Returns:
+        dict: Number of rooms, and their approximate size in bytes and the number of rooms
+            per state as of the last sweep
+    """
+    return {"rooms": len(_games), **_room_stats}
+
+
+def _collect_room_stats() -> None:
+    # only called on the event loop, which is the only thing that changes _games
+    global _room_stats
+    states, size = {}, 0
+    for game_dict in _games.values():
+        game = game_dict[GameStatesEnum.GAME_STATE]
+        states[game.room_state.name] = states.get(game.room_state.name, 0) + 1
+        size += game.get_size()
+    _room_stats = {"bytes": size, "states": states}
+
+
+def _get_bot_executor() -> ProcessPoolExecutor:
+    global _bot_executor
+    if _bot_executor is None:
+        _bot_executor = ProcessPoolExecutor(
+            max_workers=settings.BOT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _bot_executor
 
 
 class GameStatesEnum(StrEnum):
     GAME_STATE = "game_state"
     GAME_MODEL = "game_model"
+    ROOM_ACTOR = "room_actor"
+    LAST_ACTIVE = "last_active"
+
+
+# commands that are run by the RoomActor of the room,
+# they get the game as their first argument and must not await anything
+def _apply_move(
+    game: Game, x: int, y: int, player_name: str, letter: str
+) -> Tuple[bool, bool, dict, Union[Tuple[Union[str, None], List[str]], None]]:
+    is_updated = game.update_game(x, y, player_name, letter)
+    # only the move that ends the game finishes it, a move after that can't win it again
+    is_finished = game.room_state != RoomState.GAME_ENDED and game.check_for_game_finish()
+    # the rating ids are read along with the move, the players can leave before they are rated.
+    # the bots have no rating id, a game a bot wins isn't rated
+    rating_ids = None
+    if is_finished:
+        rating_ids = (
+            game.get_player(player_name).rating_id,
+            [p.rating_id for p in game.players.values() if p.rating_id],
+        )
+    return is_updated, is_finished, game.to_json(), rating_ids
 
 
-class DBObjectsMixin:
-    @database_sync_to_async
-    def _add_player_model(self, game: GameModel, player: PlayerModel):
-        game.players.add(player)
+def _apply_board_move(
+    game: LargeGame, x: int, y: int, player_name: str, letter: str
+) -> Tuple[bool, List[str], int]:
+    words = game.place_letter(x, y, player_name, letter)
+    return words is not None, words or [], game.scores.get(player_name, 0)
 
-    @database_sync_to_async
-    def _create_game_model(self, room_group_name: str, state: dict):
-        return GameModel.objects.create(
-            room_uuid=room_group_name.split("room_")[1], game_state=state
-        )
 
-    @database_sync_to_async
-    def _create_player_model(self, player_name: str):
-        return PlayerModel.objects.create(name=player_name)
+def _create_player(game: Game, player_name: str, player_class: type = Player) -> Player:
+    return game.create_player(player_name, player_class)
+
+
+def _get_chunks(game: LargeGame, keys: List[Tuple[int, int]]) -> dict:
+    return game.get_chunks(keys)
+
 
-    @database_sync_to_async
-    def _get_game_model(self, room_group_name: str) -> Union[GameModel, None]:
-        return GameModel.objects.filter(room_uuid=room_group_name.split("room_")[1]).first()
+def _remove_player(game: Game, player_name: str) -> Tuple[Union[Player, None], RoomState]:
+    player = game.remove_player(player_name)
+    # bots don't keep a room alive on their own
+    if all(x.is_bot for x in game.players.values()):
+        for bot_name in list(game.players):
+            game.remove_player(bot_name)
+    return player, game.room_state
 
-    @database_sync_to_async
-    def _get_player_model(self, player_name: str) -> Union[GameModel, None]:
-        return PlayerModel.objects.filter(name=player_name).first()
 
-    @database_sync_to_async
-    def _update_game_model(self, game_model: GameModel, game: Game) -> None:
+def _reconnect_player(game: Game, player_name: str, new_name: str) -> Union[Player, None]:
+    return game.reconnect_player(player_name, new_name)
+
+
+def _rotate_palettes(game: Game) -> List[dict]:
+    game.rotate_palettes()
+    return game.get_players()
+
+
+class DBObjectsMixin:
+    @database_pool_to_async
+    def _add_player_model(self, game: GameModel, player: PlayerModel):
+        game.players.add(player)
+
+    @database_pool_to_async
+    def _create_game_model(self, room_group_name: str, state: dict, seed: int = None):
+        room_uuid = room_group_name.split("_", 1)[1]
+        # the history row is the tombstone of an archived room, its events are still in the log
+        # and a new game under the same uuid would collide with their seqs
+        if GameHistoryModel.objects.filter(room_uuid=room_uuid).exists():
+            raise IntegrityError(f"Room {room_uuid} is archived")
+
+        game_model = GameModel.objects.create(room_uuid=room_uuid, game_state=state, seed=seed)
+        _game_model_cache.set(room_group_name, game_model)
+        return game_model
+
+    @database_pool_to_async
+    def _create_player_model(self, player_name: str, is_bot: bool = False, rating_id: str = None):
+        return PlayerModel.objects.create(name=player_name, is_bot=is_bot, rating_id=rating_id)
+
+    async def _get_game_model(self, room_group_name: str) -> Union[GameModel, None]:
+        # the game that is in memory already holds its model
+        if game_dict := _games.get(room_group_name):
+            return game_dict[GameStatesEnum.GAME_MODEL]
+
+        if game_model := _game_model_cache.get(room_group_name):
+            return game_model
+
+        return await self._query_game_model(room_group_name)
+
+    @database_pool_to_async
+    def _query_game_model(self, room_group_name: str) -> Union[GameModel, None]:
+        game_model = GameModel.objects.filter(room_uuid=room_group_name.split("_", 1)[1]).first()
+        if game_model:
+            _game_model_cache.set(room_group_name, game_model)
+        return game_model
+
+    @database_pool_to_async
+    def _update_game_model(self, game_model: GameModel, game: Game, winner: str = None) -> None:
         game_model.room_state = game.room_state
         game_model.game_state = game.game_state
+        if winner is not None:
+            game_model.winner = winner
         game_model.save()
+        # the saved instance replaces whatever the cache had for the room
+        _game_model_cache.set(game.room_group_name, game_model)
+
+    @database_pool_to_async
+    def _record_game_result(self, winner: str, players: List[str]) -> None:
+        # loading the leaderboard the first time and flushing it both query the db
+        record_game_result(winner, players)
+        flush_ratings()
+
+    @database_pool_to_async
+    def _flush_ratings(self) -> None:
+        flush_ratings(force=True)
+
+    @database_pool_to_async
+    def _append_game_events(self, room_group_name: str, events: List[dict]) -> None:
+        room_uuid = room_group_name.split("_", 1)[1]
+        GameEventModel.objects.bulk_create(
+            [
+                GameEventModel(
+                    room_uuid=room_uuid,
+                    seq=event["seq"],
+                    event_type=event["type"],
+                    data=event["data"],
+                )
+                for event in events
+            ]
+        )
+
+    @database_pool_to_async
+    def _get_game_events(self, room_group_name: str, until_seq: int = None) -> List[dict]:
+        events = GameEventModel.objects.filter(room_uuid=room_group_name.split("_", 1)[1])
+        if until_seq is not None:
+            events = events.filter(seq__lte=until_seq)
+
+        return [
+            {"seq": event.seq, "type": event.event_type, "data": event.data}
+            for event in events.order_by("seq")
+        ]
 
 
 class TaskHelperMixin:
@@ -64,9 +238,7 @@ class TaskHelperMixin:
 
         return wrapper
 
-    async def _get_task(
-        self, task_type: Literal[GameTasks.PALETTE_TASK], room_group_name: str
-    ) -> Union[dict, None]:
+    async def _get_task(self, task_type: GameTasks, room_group_name: str) -> Union[dict, None]:
         return next(
             (
                 x
@@ -77,30 +249,29 @@ class TaskHelperMixin:
         )
 
     async def _create_task(
-        self, task_type: Literal[GameTasks.PALETTE_TASK], task_func: Callable, room_group_name: str
+        self, task_type: GameTasks, task_func: Callable, room_group_name: str
     ) -> None:
         """Creates the task of given task_type
 
         Args:
-            task_type (Literal[GameTasks.PALETTE_TASK]): Type of the tasks to create
+            task_type (GameTasks): Type of the tasks to create
         """
         # see if there is already a task in _tasks, if there is no, need to create another
-        if await self._get_task(task_type, room_group_name):
-            return
-
-        if task_type == GameTasks.PALETTE_TASK:
-            palete_changer_task = asyncio.get_event_loop().create_task(task_func(room_group_name))
-            _tasks.append(
-                {
-                    "type": GameTasks.PALETTE_TASK,
-                    "task": palete_changer_task,
-                    "room_group_name": room_group_name,
-                }
-            )
+        if task_dict := await self._get_task(task_type, room_group_name):
+            if not task_dict["task"].done():
+                return
+            _tasks.remove(task_dict)
+
+        task = asyncio.get_event_loop().create_task(task_func(room_group_name))
+        _tasks.append(
+            {
+                "type": task_type,
+                "task": task,
+                "room_group_name": room_group_name,
+            }
+        )
 
-    async def _cancel_task(
-        self, task_type: Literal[GameTasks.PALETTE_TASK], room_group_name: str
-    ) -> None:
+    async def _cancel_task(self, task_type: GameTasks, room_group_name: str) -> None:
         """Cancels the task with given task_type
 
         Args:
@@ -112,11 +283,15 @@ class TaskHelperMixin:
                 # if task is cancelled, delete the task from _tasks
                 _tasks.remove(task_dict)
 
-    async def _cancel_all_tasks(self):
-        for task_dict in _tasks:
-            cancelled = task_dict["task"].cancel()
-            if cancelled:
-                _tasks.remove(task_dict)
+    async def _cancel_all_tasks(self, room_group_name: str) -> None:
+        """Cancels every task of the room
+
+        Args:
+            room_group_name (str): Room of the tasks
+        """
+        for task_dict in [x for x in _tasks if x["room_group_name"] == room_group_name]:
+            task_dict["task"].cancel()
+            _tasks.remove(task_dict)
 
 
 class GameManagerMixin(DBObjectsMixin, TaskHelperMixin):
@@ -127,50 +302,219 @@ class GameManagerMixin(DBObjectsMixin, TaskHelperMixin):
         _games[room_group_name] = {
             GameStatesEnum.GAME_STATE: game,
             GameStatesEnum.GAME_MODEL: game_model,
+            GameStatesEnum.ROOM_ACTOR: RoomActor(game),
+            GameStatesEnum.LAST_ACTIVE: time.monotonic(),
         }
+        await self._start_room_sweeper()
+        await self._evict_lobbies_over_cap()
+
+    async def _get_actor(self, room_group_name: str) -> Union[RoomActor, None]:
+        if not (game_dict := _games.get(room_group_name)):
+            return None
+
+        # every mutation goes through the actor, so this is when the room is used
+        game_dict[GameStatesEnum.LAST_ACTIVE] = time.monotonic()
+        _games.move_to_end(room_group_name)
+        return game_dict[GameStatesEnum.ROOM_ACTOR]
+
+    async def _stop_actor(self, room_group_name: str) -> None:
+        if actor := await self._get_actor(room_group_name):
+            actor.stop()
 
     async def can_game_continue(self, room_group_name: str, player_name: str) -> bool:
         game = await self._get_game(room_group_name)
         return (
-            game.room_state == RoomState.GAME_IN_PROGRESS and game.get_player(player_name).can_play
+            game is not None
+            and game.room_state == RoomState.GAME_IN_PROGRESS
+            and game.get_player(player_name).can_play
         )
 
-    async def _create_game(self, room_group_name: str) -> Game:
-        game = Game(room_group_name=room_group_name)
-        game_model = await self._create_game_model(room_group_name, game.game_state)
+    async def _create_game(self, room_group_name: str, game_class: type = Game) -> Game:
+        game = game_class(room_group_name=room_group_name)
+        game_model = await self._create_game_model(room_group_name, game.game_state, game.seed)
         await self._add_game(room_group_name, game, game_model)
         return game, game_model
 
-    async def create_player(self, room_group_name: str, player_name: str) -> Union[Player, None]:
+    async def create_player(
+        self, room_group_name: str, player_name: str, rating_id: str = None
+    ) -> Union[Player, None]:
         game = await self._get_game(room_group_name)
-        if game.room_state not in [RoomState.IN_LOBBY, RoomState.GAME_ENDED]:
+        if not game.can_join():
+            return None
+
+        actor = await self._get_actor(room_group_name)
+        player = await actor.ask(
+            _create_player, player_name, functools.partial(Player, rating_id=rating_id)
+        )
+        if not player:
             return None
 
-        player = game.create_player(player_name)
-        player_model = await self._create_player_model(player_name)
+        player_model = await self._create_player_model(player_name, rating_id=rating_id)
         game_model = await self._get_game_model(room_group_name)
         await self._add_player_model(game_model, player_model)
 
         if game.room_state == RoomState.GAME_IN_PROGRESS:
-            await self._create_task(GameTasks.PALETTE_TASK, self._palette_changer, room_group_name)
+            await self._start_game_tasks(room_group_name)
+        elif settings.BOT_JOIN_TIMEOUT is not None:
+            # fill the empty seat with a bot if nobody else joins in time
+            await self._create_task(GameTasks.BOT_JOIN_TASK, self._bot_joiner, room_group_name)
 
         return player
 
+    async def _start_game_tasks(self, room_group_name: str) -> None:
+        game = await self._get_game(room_group_name)
+        await self._create_task(GameTasks.PALETTE_TASK, self._palette_changer, room_group_name)
+        if any(player.is_bot for player in game.players.values()):
+            await self._create_task(GameTasks.BOT_MOVE_TASK, self._bot_player, room_group_name)
+
     async def _get_game(self, room_group_name: str) -> Union[Game, None]:
         return _games.get(room_group_name, {}).get(GameStatesEnum.GAME_STATE)
 
-    async def get_or_create_game(self, room_group_name) -> Tuple[Game, GameModel]:
+    async def get_or_create_game(
+        self, room_group_name, game_class: type = Game
+    ) -> Tuple[Game, GameModel]:
         game = await self._get_game(room_group_name)
         game_model = await self._get_game_model(room_group_name)
 
+        # a shared board outlives the worker that holds it, so it's rebuilt from its events
+        # once it's evicted or the worker restarts instead of being created again
+        if (
+            not game
+            and game_model
+            and (board := await self._restore_board(room_group_name, game_model))
+        ):
+            return board, game_model
+
         if not game or not game_model:
-            game, game_model = await self._create_game(room_group_name)
+            game, game_model = await self._create_game(room_group_name, game_class)
 
         return game, game_model
 
-    async def get_players(self, room_group_name: str) -> List[dict]:
+    async def _restore_board(
+        self, room_group_name: str, game_model: GameModel
+    ) -> Union[LargeGame, None]:
+        board = await self.replay_game(room_group_name)
+        # the rooms of two players aren't restored, a new connection to them is refused
+        if not isinstance(board, LargeGame):
+            return None
+
+        # another connection restored it while the events were read
+        if game := await self._get_game(room_group_name):
+            return game
+
+        board.room_group_name = room_group_name
+        board.reopen()
+        await self._add_game(room_group_name, board, game_model)
+        return board
+
+    async def count_games(self, room_state: RoomState) -> int:
+        return sum(
+            1 for x in _games.values() if x[GameStatesEnum.GAME_STATE].room_state == room_state
+        )
+
+    async def persist_games(self) -> None:
+        """Saves the state and the pending events of every game in memory
+        and the pending ratings to the db"""
+        for room_group_name, game_dict in list(_games.items()):
+            await self._update_game_model(
+                game_dict[GameStatesEnum.GAME_MODEL], game_dict[GameStatesEnum.GAME_STATE]
+            )
+            await self.flush_game_events(room_group_name, force=True)
+        await self._flush_ratings()
+
+    async def evict_game(self, room_group_name: str) -> None:
+        """Saves the game to the db and removes it from the memory,
+        players that are still in the room are disconnected
+
+        Args:
+            room_group_name (str): Room of the game
+        """
+        if not (game_dict := _games.get(room_group_name)):
+            return
+
+        game = game_dict[GameStatesEnum.GAME_STATE]
+        await self._update_game_model(game_dict[GameStatesEnum.GAME_MODEL], game)
+        await self.flush_game_events(room_group_name, force=True)
+        await self._cancel_all_tasks(room_group_name)
+        self.drop_room_sessions(room_group_name)
+        await self._stop_actor(room_group_name)
+        _games.pop(room_group_name, None)
+        _game_model_cache.invalidate(room_group_name)
+
+        if game.players:
+            await self.channel_layer.group_send(room_group_name, {"type": "close_room"})
+
+    async def _evict_lobbies_over_cap(self) -> None:
+        over_cap = len(_games) - settings.ROOM_MAX_RESIDENT
+        if over_cap <= 0:
+            return
+
+        lobbies = [
+            room_group_name
+            for room_group_name, game_dict in _games.items()
+            if game_dict[GameStatesEnum.GAME_STATE].room_state == RoomState.IN_LOBBY
+        ]
+        # _games is ordered from the least recently used room
+        for room_group_name in lobbies[:over_cap]:
+            await self.evict_game(room_group_name)
+
+    async def sweep_games(self) -> None:
+        """Evicts the ended and aborted rooms after settings.ROOM_ENDED_TTL
+        and any other room that is idle for settings.ROOM_IDLE_TTL seconds"""
+        now = time.monotonic()
+        for room_group_name, game_dict in list(_games.items()):
+            idle = now - game_dict[GameStatesEnum.LAST_ACTIVE]
+            room_state = game_dict[GameStatesEnum.GAME_STATE].room_state
+            if room_state in [RoomState.GAME_ENDED, RoomState.GAME_ABORTED]:
+                ttl = settings.ROOM_ENDED_TTL
+            else:
+                ttl = settings.ROOM_IDLE_TTL
+
+            if idle > ttl:
+                await self.evict_game(room_group_name)
+
+        await self._evict_lobbies_over_cap()
+        _collect_room_stats()
+
+    async def _start_room_sweeper(self) -> None:
+        global _room_sweeper
+        if _room_sweeper is None or _room_sweeper.done():
+            _room_sweeper = asyncio.get_event_loop().create_task(self._sweep_games_forever())
+
+    @TaskHelperMixin.task
+    async def _sweep_games_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.ROOM_SWEEP_INTERVAL)
+            await self.sweep_games()
+            # a quiet worker doesn't fill a batch, write its ratings every sweep instead
+            await self._flush_ratings()
+            # new rooms take their grids from the pools instead of generating them
+            fill_grid_pools()
+
+    async def get_players(self, room_group_name: str, names: List[str] = None) -> List[dict]:
         game = await self._get_game(room_group_name)
-        return game.get_players()
+        return game.get_players(names)
+
+    async def group_send_frame(self, group: str, content: dict) -> None:
+        """Sends a frame to every channel of the group, encoded and compressed only once
+
+        Args:
+            group (str): Channel group to send the frame to
+            content (dict): Json content of the frame the clients get
+        """
+        await self.channel_layer.group_send(group, {"type": "send_frame", **encode_frame(content)})
+
+    async def send_to_players(self, player_names: List[str], message: dict) -> None:
+        """Sends the message only to the given players of a room instead of its whole group,
+        the names of the players are their channel names
+
+        Args:
+            player_names (List[str]): Names of the players to send the message to
+            message (dict): Message with the type of the consumer handler
+        """
+        await asyncio.gather(
+            *(self.channel_layer.send(name, message) for name in player_names if name)
+        )
 
     @cancel_tasks_on_room_state_change
     async def remove_player_from_game(
@@ -184,43 +528,350 @@ class GameManagerMixin(DBObjectsMixin, TaskHelperMixin):
             RoomState.GAME_ABORTED,
         ],
     ]:
-        game: Game = await self._get_game(room_group_name)
-        if not game:
+        # the session goes even if the room is already evicted
+        self.drop_session(player_name)
+        actor = await self._get_actor(room_group_name)
+        if not actor:
             return None, None
 
-        player = game.remove_player(player_name)
-        return player, game.room_state
+        player, room_state = await actor.ask(_remove_player, player_name)
+        await self.flush_game_events(room_group_name, force=True)
+        return player, room_state
+
+    def create_session(self, room_group_name: str, player_name: str) -> str:
+        """Creates the token a player reconnects to its seat with
+
+        Args:
+            room_group_name (str): Room of the player
+            player_name (str): Name of the player
+
+        Returns:
+            str: Session token of the player
+        """
+        token = secrets.token_urlsafe(16)
+        _sessions[token] = {"room": room_group_name, "player": player_name, "timer": None}
+        _session_tokens[player_name] = token
+        _room_sessions.setdefault(room_group_name, set()).add(token)
+        return token
+
+    def drop_session(self, player_name: str) -> None:
+        if not (token := _session_tokens.pop(player_name, None)):
+            return
+
+        session = _sessions.pop(token)
+        if session["timer"]:
+            session["timer"].cancel()
+
+        tokens = _room_sessions.get(session["room"], set())
+        tokens.discard(token)
+        if not tokens:
+            _room_sessions.pop(session["room"], None)
+
+    def drop_room_sessions(self, room_group_name: str) -> List[str]:
+        """Drops the sessions of every player of the room and cancels their held seats
+
+        Args:
+            room_group_name (str): Room of the sessions
+
+        Returns:
+            List[str]: Names of the players whose seats were held, they are still in the game
+        """
+        held = []
+        for token in list(_room_sessions.get(room_group_name, ())):
+            session = _sessions[token]
+            if session["timer"]:
+                held.append(session["player"])
+            self.drop_session(session["player"])
+        return held
+
+    async def hold_seat(self, room_group_name: str, player_name: str) -> bool:
+        """Keeps the seat of a disconnected player for SESSION_GRACE_PERIOD seconds,
+        the player is removed if it doesn't reconnect until then
 
-    async def steal_palette(self, room_group_name: str, thief_name: str, victim_name: str):
+        Args:
+            room_group_name (str): Room of the player
+            player_name (str): Name of the disconnected player
+
+        Returns:
+            bool: Whether the seat is held, False if the player has to be removed right away
+        """
         game = await self._get_game(room_group_name)
-        return game.steal_palette(thief_name, victim_name)
+        token = _session_tokens.get(player_name)
+        if (
+            not settings.SESSION_GRACE_PERIOD
+            or not token
+            or not game
+            or game.room_state != RoomState.GAME_IN_PROGRESS
+        ):
+            self.drop_session(player_name)
+            return False
+
+        # a timer handle instead of a task, nothing runs for the room until it expires
+        loop = asyncio.get_event_loop()
+        _sessions[token]["timer"] = loop.call_later(
+            settings.SESSION_GRACE_PERIOD,
+            lambda: loop.create_task(self._release_seat(room_group_name, player_name)),
+        )
+        return True
+
+    async def _release_seat(self, room_group_name: str, player_name: str) -> None:
+        player, room_state = await self.remove_player_from_game(room_group_name, player_name)
+        if player:
+            await self.channel_layer.group_send(
+                room_group_name,
+                {
+                    "type": "notify_player_disconnected",
+                    "message": player.name,
+                    "room_state": room_state,
+                },
+            )
+
+    async def resume_session(
+        self, room_group_name: str, token: str, player_name: str
+    ) -> Union[Player, None]:
+        """Puts a reconnecting player back into its held seat under its new name
+
+        Args:
+            room_group_name (str): Room the player is reconnecting to
+            token (str): Session token of the player
+            player_name (str): Name of the new connection of the player
+
+        Returns:
+            Union[Player, None]: Player in its old seat, None if the session is over
+        """
+        session = _sessions.get(token)
+        if not session or session["room"] != room_group_name or not session["timer"]:
+            return None
+        if not (actor := await self._get_actor(room_group_name)):
+            return None
+
+        player = await actor.ask(_reconnect_player, session["player"], player_name)
+        if not player:
+            return None
+
+        session["timer"].cancel()
+        session["timer"] = None
+        _session_tokens.pop(session["player"], None)
+        session["player"] = player_name
+        _session_tokens[player_name] = token
+
+        player_model = await self._create_player_model(player_name, rating_id=player.rating_id)
+        game_model = await self._get_game_model(room_group_name)
+        await self._add_player_model(game_model, player_model)
+        await self.flush_game_events(room_group_name)
+        return player
+
+    async def steal_palette(
+        self, room_group_name: str, thief_name: str, victim_name: str = None
+    ) -> bool:
+        if not (actor := await self._get_actor(room_group_name)):
+            return False
+
+        is_stolen = await actor.ask(Game.steal_palette, thief_name, victim_name)
+        await self.flush_game_events(room_group_name)
+        return is_stolen
 
     @cancel_tasks_on_room_state_change
     async def update_game(
         self, room_group_name, x, y, channel_name, letter
     ) -> Tuple[bool, bool, dict]:
         game = await self._get_game(room_group_name)
-        is_updated = game.update_game(x, y, channel_name, letter)
-        is_finished = game.check_for_game_finish()
+        actor = await self._get_actor(room_group_name)
+        is_updated, is_finished, game_data, rating_ids = await actor.ask(
+            _apply_move, x, y, channel_name, letter
+        )
 
         if is_finished:
             # save to the db if the game is finished
             game_model = await self._get_game_model(room_group_name)
-            await self._update_game_model(game_model, game)
+            await self._update_game_model(game_model, game, channel_name)
+            await self._record_game_result(*rating_ids)
+
+        await self.flush_game_events(room_group_name, force=is_finished)
+        return is_updated, is_finished, game_data
+
+    async def notify_move(
+        self,
+        room_group_name: str,
+        player_name: str,
+        is_updated: bool,
+        is_finished: bool,
+        game_data: dict,
+    ) -> None:
+        """Sends the outcome of a move made by `player_name` to the room
+
+        Args:
+            room_group_name (str): Room of the game
+            player_name (str): Player that made the move
+            is_updated (bool): Whether the move was put on the grid
+            is_finished (bool): Whether the move finished the game
+            game_data (dict): Serialized game
+        """
+        if is_updated:
+            await self.group_send_frame(
+                room_group_name, {"type": GameStateEnum.GAME_STATE_SYNC, "message": game_data}
+            )
+
+        if is_finished:
+            await self.channel_layer.group_send(
+                room_group_name,
+                {
+                    "type": "notify_game_ended",
+                    "message": {"winner": player_name},
+                },
+            )
+
+    async def flush_game_events(self, room_group_name: str, force: bool = False) -> None:
+        """Writes the pending events of the game to the db in a single batch
 
-        return is_updated, is_finished, game.to_json()
+        Args:
+            room_group_name (str): Room of the game
+            force (bool, optional): Write the events even if there are less than
+                settings.GAME_EVENT_BATCH_SIZE of them. Defaults to False.
+        """
+        game = await self._get_game(room_group_name)
+        if not game or not game.pending_events:
+            return
+
+        if not force and len(game.pending_events) < settings.GAME_EVENT_BATCH_SIZE:
+            return
+
+        actor = await self._get_actor(room_group_name)
+        if events := await actor.ask(Game.pop_pending_events):
+            await self._append_game_events(room_group_name, events)
+
+    async def replay_game(self, room_group_name: str, until_seq: int = None) -> Union[Game, None]:
+        """Rebuilds the game of the room from its event log
+
+        Args:
+            room_group_name (str): Room of the game
+            until_seq (int, optional): Last event to apply, replays the whole log if None
+
+        Returns:
+            Union[Game, None]: Replayed game, None if there are no events for the room
+        """
+        # make sure the events that are still in memory are a part of the replay
+        await self.flush_game_events(room_group_name, force=True)
+        events = await self._get_game_events(room_group_name, until_seq)
+        if not events:
+            return None
+
+        # only the games on a large board are created with a chunk size
+        game_class = LargeGame if "chunk_size" in events[0]["data"] else Game
+        return game_class.replay(events, until_seq)
+
+    async def get_chunks(
+        self, room_group_name: str, keys: List[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], list]:
+        """Returns the cells of the chunks of a large board
+
+        Args:
+            room_group_name (str): Room of the game
+            keys (List[Tuple[int, int]]): Keys of the chunks
+
+        Returns:
+            Dict[Tuple[int, int], list]: Key to the cells of the chunk
+        """
+        if not (actor := await self._get_actor(room_group_name)):
+            return {}
+
+        chunks = await actor.ask(_get_chunks, keys)
+        await self.flush_game_events(room_group_name)
+        return chunks
+
+    async def update_board(
+        self, room_group_name: str, x: int, y: int, channel_name: str, letter: str
+    ) -> Tuple[bool, List[str], int]:
+        """Puts a letter on a large board, the words it makes are scored for the player
+
+        Args:
+            room_group_name (str): Room of the game
+            x (int): row of the board
+            y (int): column of the board
+            channel_name (str): Player that made the move
+            letter (str): Letter of the player
+
+        Returns:
+            Tuple[bool, List[str], int]: Whether the letter is placed,
+                the words it made and the score of the player
+        """
+        actor = await self._get_actor(room_group_name)
+        result = await actor.ask(_apply_board_move, x, y, channel_name, letter)
+        await self.flush_game_events(room_group_name)
+        return result
 
     @TaskHelperMixin.task
     async def _palette_changer(self, room_group_name: str) -> None:
         game = await self._get_game(room_group_name)
+        actor = await self._get_actor(room_group_name)
         while game.room_state == RoomState.GAME_IN_PROGRESS:
             await asyncio.sleep(game.palette_change_cooldown)
-            for player in game.players:
-                player.reset_palette(generate_random_palette(game.palette_size))
-            await self.channel_layer.group_send(
-                game.room_group_name,
-                {
-                    "type": "notify_palette_change",
-                    "players": game.get_players(),
-                },
+            players = await actor.ask(_rotate_palettes)
+            await self.flush_game_events(room_group_name)
+            if game.shares_palettes:
+                await self.group_send_frame(
+                    game.room_group_name,
+                    {"type": GameStateEnum.PALETTE_SYNC, "message": players},
+                )
+                continue
+
+            # send everyone only their own palette
+            for player in players:
+                await self.send_to_players(
+                    [player["name"]],
+                    {
+                        "type": "send_frame",
+                        **encode_frame({"type": GameStateEnum.PALETTE_SYNC, "message": [player]}),
+                    },
+                )
+
+    @TaskHelperMixin.task
+    async def _bot_joiner(self, room_group_name: str) -> None:
+        await asyncio.sleep(settings.BOT_JOIN_TIMEOUT)
+        game = await self._get_game(room_group_name)
+        if not game or game.room_state != RoomState.IN_LOBBY or not game.players:
+            return
+
+        # fill every empty seat, the game starts once the last one is taken
+        actor = await self._get_actor(room_group_name)
+        game_model = await self._get_game_model(room_group_name)
+        while game.room_state == RoomState.IN_LOBBY:
+            bot = await actor.ask(_create_player, f"bot_{uuid.uuid4().hex}", Bot)
+            if not bot:
+                return
+
+            player_model = await self._create_player_model(bot.name, is_bot=True)
+            await self._add_player_model(game_model, player_model)
+
+        if game.room_state == RoomState.GAME_IN_PROGRESS:
+            await self._start_game_tasks(room_group_name)
+            await self.group_send_frame(
+                room_group_name, {"type": RoomState.GAME_START, "message": game.to_json()}
             )
+
+    @TaskHelperMixin.task
+    async def _bot_player(self, room_group_name: str) -> None:
+        game = await self._get_game(room_group_name)
+        loop = asyncio.get_event_loop()
+        while game.room_state == RoomState.GAME_IN_PROGRESS:
+            await asyncio.sleep(settings.BOT_MOVE_INTERVAL)
+            for bot in [p for p in game.players.values() if p.is_bot and p.can_play]:
+                move = await loop.run_in_executor(
+                    _get_bot_executor(),
+                    find_best_move,
+                    [row[:] for row in game.game_state],
+                    list(bot.palette),
+                    game.word_size,
+                    settings.BOT_MOVE_TIME_BUDGET,
+                )
+                if not move or game.room_state != RoomState.GAME_IN_PROGRESS:
+                    continue
+
+                x, y, letter = move
+                is_updated, is_finished, game_data = await self.update_game(
+                    room_group_name, x, y, bot.name, letter
+                )
+                # finishing the game cancels this task, don't let that cut the broadcast
+                await asyncio.shield(
+                    self.notify_move(room_group_name, bot.name, is_updated, is_finished, game_data)
+                )
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+from django.conf import settings
+
+# names that ManifestStaticFilesStorage gives to the files, e.g. styles.0123456789ab.css
+_fingerprinted = re.compile(r"\.[0-9a-f]{12}\.")
+# encodings in the order they are preferred, with the suffix of their precompressed file
+_encodings = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticFile:
+    """Static file read into memory along with its precompressed variants"""
+
+    def __init__(self, path: Path) -> None:
+        self.variants: Dict[str, bytes] = {"identity": path.read_bytes()}
+        for encoding, suffix in _encodings:
+            compressed = path.with_name(path.name + suffix)
+            if compressed.is_file():
+                self.variants[encoding] = compressed.read_bytes()
+
+        self.etag = f'"{hashlib.md5(self.variants["identity"]).hexdigest()}"'.encode()
+        self.content_type = (
+            mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        ).encode()
+        if _fingerprinted.search(path.name):
+            self.cache_control = f"public, max-age={settings.STATIC_MAX_AGE}, immutable".encode()
+        else:
+            self.cache_control = b"public, max-age=60"
+
+    def get_variant(self, accept_encoding: str) -> Tuple[str, bytes]:
+        for encoding, _ in _encodings:
+            if encoding in self.variants and encoding in accept_encoding:
+                return encoding, self.variants[encoding]
+        return "identity", self.variants["identity"]
+
+
+class StaticFilesApp:
+    """ASGI app that serves the collected static files from memory with ETags
+    and precompressed variants, every other request is passed to `application`"""
+
+    def __init__(self, application, root: Path = None, prefix: str = None) -> None:
+        self.application = application
+        self.root = Path(root or settings.STATIC_ROOT).resolve()
+        self.prefix = prefix or "/" + settings.STATIC_URL.lstrip("/")
+        self._files: Dict[str, StaticFile] = {}
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.prefix)
+        ):
+            return await self.application(scope, receive, send)
+
+        static_file = await self._get_file(scope["path"][len(self.prefix) :])
+        if static_file is None:
+            return await self.application(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        response_headers = [
+            (b"etag", static_file.etag),
+            (b"cache-control", static_file.cache_control),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if static_file.etag in headers.get(b"if-none-match", b""):
+            await send({"type": "http.response.start", "status": 304, "headers": response_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        encoding, body = static_file.get_variant(headers.get(b"accept-encoding", b"").decode())
+        response_headers += [
+            (b"content-type", static_file.content_type),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if encoding != "identity":
+            response_headers.append((b"content-encoding", encoding.encode()))
+
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send(
+            {"type": "http.response.body", "body": body if scope["method"] == "GET" else b""}
+        )
+
+    async def _get_file(self, name: str) -> Union[StaticFile, None]:
+        if name not in self._files:
+            static_file = await asyncio.get_event_loop().run_in_executor(
+                None, self._load_file, name
+            )
+            # missing files aren't remembered, otherwise any url could grow the dict
+            if static_file is None:
+                return None
+            self._files[name] = static_file
+        return self._files[name]
+
+    def _load_file(self, name: str) -> Union[StaticFile, None]:
+        path = (self.root / name).resolve()
+        # don't serve anything outside of the static root
+        if self.root not in path.parents or not path.is_file():
+            return None
+        return StaticFile(path)
@@ -4,13 +4,20 @@ from tictactoe.game import GameTasks, RoomState
 def cancel_tasks_on_room_state_change(f):
     async def wrapper(self, *args, **kwargs):
         out = await f(self, *args, **kwargs)
-        room_group_name = next((x for x in args if x.startswith("room_")), None)
+        room_group_name = next((x for x in args if x.startswith(("room_", "board_"))), None)
         game = await self._get_game(room_group_name)
         if not game:
             return out
 
         if game.room_state in [RoomState.GAME_ABORTED, RoomState.GAME_ENDED]:
-            await self._cancel_all_tasks()
+            await self._cancel_all_tasks(room_group_name)
+            # a held seat of a room that is over is never resumed, so its player goes now.
+            # the others aren't told, the end of the room is what they get
+            for player_name in self.drop_room_sessions(room_group_name):
+                await self.remove_player_from_game(room_group_name, player_name)
+            # nobody is left to send commands to an aborted room
+            if game.room_state == RoomState.GAME_ABORTED:
+                await self._stop_actor(room_group_name)
 
         elif game.room_state == RoomState.IN_LOBBY:
             await self._cancel_task(GameTasks.PALETTE_TASK, room_group_name)
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from tictactoe.game import RoomState
+from tictactoe.models import GameHistoryModel, GameModel, PlayerModel
+from tictactoe.util.matrix import pack_grid
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the ended and aborted games that are older than --older-than-hours "
+        "into the history table and prunes the players that aren't in any game. "
+        "Works in batches with a short transaction each, so it can run next to the servers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-hours", type=float, default=24)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["older_than_hours"])
+        batch_size = options["batch_size"]
+
+        archived = 0
+        while count := self.archive_batch(cutoff, batch_size):
+            archived += count
+
+        pruned = 0
+        while count := self.prune_players_batch(cutoff, batch_size):
+            pruned += count
+
+        self.stdout.write(f"Archived {archived} games and pruned {pruned} players")
+
+    def archive_batch(self, cutoff, batch_size: int) -> int:
+        with transaction.atomic():
+            games = list(
+                GameModel.objects.filter(
+                    room_state__in=[RoomState.GAME_ENDED, RoomState.GAME_ABORTED],
+                    updated_at__lt=cutoff,
+                )
+                .order_by("updated_at")
+                .prefetch_related("players")[:batch_size]
+            )
+            if not games:
+                return 0
+
+            GameHistoryModel.objects.bulk_create(
+                [
+                    GameHistoryModel(
+                        room_uuid=game.room_uuid,
+                        room_state=game.room_state,
+                        rows=len(game.game_state),
+                        cols=len(game.game_state[0]) if game.game_state else 0,
+                        grid=pack_grid(game.game_state),
+                        player_count=len(game.players.all()),
+                        rated_players={
+                            p.name: p.rating_id for p in game.players.all() if p.rating_id
+                        },
+                        winner=game.winner,
+                        finished_at=game.updated_at,
+                    )
+                    for game in games
+                ]
+            )
+            GameModel.objects.filter(room_uuid__in=[game.room_uuid for game in games]).delete()
+
+        return len(games)
+
+    def prune_players_batch(self, cutoff, batch_size: int) -> int:
+        # the players that are created just now might not be added to their game yet
+        ids = list(
+            PlayerModel.objects.filter(gamemodel__isnull=True, created_at__lt=cutoff).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        PlayerModel.objects.filter(id__in=ids).delete()
+        return len(ids)
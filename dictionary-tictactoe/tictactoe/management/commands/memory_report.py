@@ -0,0 +1,68 @@
+import gc
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from tictactoe.game import Game, Player
+from tictactoe.util.palette import generate_random_palette, get_letter_distribution
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds a synthetic population of rooms in memory and reports the bytes a room "
+        "and a player take, measured with tracemalloc, and how many rooms fit in a memory budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=5000)
+        parser.add_argument("--players-per-room", type=int, default=2)
+        parser.add_argument(
+            "--budget-mb",
+            type=int,
+            default=512,
+            help="Memory of a worker that is available for the rooms",
+        )
+
+    def measure(self, build) -> int:
+        """Returns the bytes that are still allocated by what `build` returns"""
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        population = build()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        del population
+        return size
+
+    def build_rooms(self, rooms: int, players_per_room: int) -> list:
+        games = []
+        for i in range(rooms):
+            game = Game(max_players=players_per_room, room_group_name=f"room_{i}")
+            for j in range(players_per_room):
+                game.create_player(f"player_{i}_{j}")
+            # the events of a resident room are flushed to the db in batches
+            game.pop_pending_events()
+            games.append(game)
+        return games
+
+    def handle(self, *args, **options):
+        rooms, players_per_room = options["rooms"], options["players_per_room"]
+        # the word list and the letter tables are shared by every room, load them up front
+        get_letter_distribution()
+
+        room_bytes = self.measure(lambda: self.build_rooms(rooms, players_per_room))
+        player_bytes = self.measure(
+            lambda: [Player(f"player_{i}", generate_random_palette(10)) for i in range(rooms)]
+        )
+
+        per_room = room_bytes / rooms
+        per_player = player_bytes / rooms
+        estimate = sum(game.get_size() for game in self.build_rooms(100, players_per_room)) / 100
+        self.stdout.write(f"Rooms: {rooms} with {players_per_room} players each")
+        self.stdout.write(f"Bytes per room: {per_room:.0f} (get_size estimates {estimate:.0f})")
+        self.stdout.write(f"Bytes per player: {per_player:.0f} (names included)")
+        self.stdout.write(
+            f"Rooms in {options['budget_mb']}MB: {int(options['budget_mb'] * 2**20 // per_room)}"
+        )
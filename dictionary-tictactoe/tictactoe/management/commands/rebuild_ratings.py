@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+from tictactoe.helper.leaderboard import rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the ratings of every player from the won games, the archived ones included, "
+        "in a single streaming pass and replaces the saved ratings with them. "
+        "Running workers keep their own leaderboard until they are restarted."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        players = rebuild_leaderboard()
+        self.stdout.write(f"Rated {players} players in {time.monotonic() - started:.1f}s")
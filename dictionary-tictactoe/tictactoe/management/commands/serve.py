@@ -0,0 +1,214 @@
+import asyncio
+import gc
+import inspect
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _preload() -> dict:
+    """Loads the app and every immutable table it uses so the forked workers share them
+
+    Returns:
+        dict: Seconds each phase took
+    """
+    from django.db import connections
+
+    timings = {}
+
+    started = time.monotonic()
+    # imports the consumers, which read words.txt
+    import conf.asgi  # noqa: F401
+
+    timings["import_app"] = time.monotonic() - started
+
+    from tictactoe.game import Game
+    from tictactoe.util.palette import get_letter_distribution
+    from tictactoe.util.solver import get_word_index
+
+    started = time.monotonic()
+    get_letter_distribution()
+    # the index of the default word size, read from the signature so no game is built for it
+    get_word_index(inspect.signature(Game).parameters["word_size"].default)
+    timings["build_tables"] = time.monotonic() - started
+
+    started = time.monotonic()
+    # the workers must not share the connections of the parent
+    connections.close_all()
+    # move everything that is loaded so far out of the reach of the cyclic gc,
+    # otherwise collections in the workers write to these objects and unshare their pages
+    gc.collect()
+    gc.freeze()
+    timings["freeze"] = time.monotonic() - started
+
+    return timings
+
+
+def _run_worker(
+    sock: socket.socket, options: dict, ready: multiprocessing.Queue, forked_at: float
+) -> None:
+    """Runs a daphne server on the shared listening socket until it's drained,
+    the worker puts its pid and how long it took to start on `ready` once it's serving"""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "conf.settings")
+    django.setup()
+
+    # daphne.server installs the asyncio reactor, it has to be imported before the reactor
+    from daphne.server import Server
+    from twisted.internet import reactor
+
+    from conf.asgi import application
+    from tictactoe.game import RoomState
+    from tictactoe.helper import GameManagerMixin
+    from tictactoe.helper.health import is_draining, start_draining
+
+    manager = GameManagerMixin()
+
+    async def drain() -> None:
+        # stop taking new players, give the running games some time to finish
+        # and save whatever is left in memory before the worker exits
+        if is_draining():
+            return
+
+        start_draining()
+        deadline = time.monotonic() + options["drain_timeout"]
+        while time.monotonic() < deadline and await manager.count_games(RoomState.GAME_IN_PROGRESS):
+            await asyncio.sleep(1)
+
+        await manager.persist_games()
+        reactor.stop()
+
+    def install_signal_handlers() -> None:
+        loop = asyncio.get_event_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, lambda: loop.create_task(drain()))
+
+        ready.put((os.getpid(), (time.monotonic() - forked_at) * 1000))
+
+    Server(
+        application,
+        endpoints=[f"fd:fileno={sock.fileno()}"],
+        signal_handlers=False,
+        ready_callable=install_signal_handlers,
+        application_close_timeout=options["drain_timeout"],
+        verbosity=options["verbosity"],
+    ).run()
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the ASGI application on multiple daphne worker processes that share one socket. "
+        "Games are kept in the memory of the worker that owns them, so the workers need "
+        "a shared channel layer and room affinity in front of them to serve the same room."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of worker processes, more than one needs a shared channel layer "
+                "since the in memory layer only reaches the consumers of its own process"
+            ),
+        )
+        parser.add_argument(
+            "--pin",
+            action="store_true",
+            help="Pin every worker to a single core",
+        )
+        parser.add_argument(
+            "--preload",
+            action="store_true",
+            help=(
+                "Load the app and its word tables once and fork the workers from it, "
+                "instead of starting every worker from scratch"
+            ),
+        )
+        parser.add_argument(
+            "--drain-timeout",
+            type=int,
+            default=30,
+            help="Seconds a worker waits for the running games to finish on shutdown",
+        )
+
+    def handle(self, *args, **options):
+        backend = settings.CHANNEL_LAYERS["default"]["BACKEND"]
+        if options["workers"] > 1 and backend == "channels.layers.InMemoryChannelLayer":
+            raise CommandError(
+                "The players of a room would be split across workers that can't see each other, "
+                "configure a shared channel layer to run more than one worker"
+            )
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((options["host"], options["port"]))
+        sock.listen(1024)
+        sock.set_inheritable(True)
+
+        if options["preload"]:
+            for phase, seconds in _preload().items():
+                self.stdout.write(f"Preload {phase}: {seconds * 1000:.1f}ms")
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context("spawn")
+
+        workers = {}
+        stopping = False
+        ready = context.Queue()
+
+        def start_worker(index: int) -> None:
+            worker = context.Process(
+                target=_run_worker, args=(sock, options, ready, time.monotonic()), daemon=False
+            )
+            worker.start()
+            if options["pin"] and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(worker.pid, {index % os.cpu_count()})
+            workers[index] = worker
+
+        def stop_workers(signum, frame) -> None:
+            nonlocal stopping
+            stopping = True
+            for worker in workers.values():
+                if worker.is_alive():
+                    os.kill(worker.pid, signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, stop_workers)
+        signal.signal(signal.SIGINT, stop_workers)
+
+        for index in range(options["workers"]):
+            start_worker(index)
+        self.stdout.write(
+            f"Serving on {options['host']}:{options['port']} with {len(workers)} workers"
+        )
+
+        # restart the workers that crash until we are told to stop
+        while workers:
+            while True:
+                try:
+                    pid, startup = ready.get_nowait()
+                except queue.Empty:
+                    break
+                self.stdout.write(f"Worker {pid} is ready in {startup:.1f}ms")
+
+            for index, worker in list(workers.items()):
+                worker.join(timeout=0.5)
+                if worker.is_alive():
+                    continue
+                if stopping:
+                    del workers[index]
+                else:
+                    self.stderr.write(f"Worker {worker.pid} exited with {worker.exitcode}")
+                    start_worker(index)
+
+        sock.close()
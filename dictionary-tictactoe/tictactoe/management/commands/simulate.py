@@ -0,0 +1,140 @@
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from tictactoe.util.simulator import STRATEGIES, get_percentile, simulate_batch
+
+# Game and Player arguments that can be swept, every combination of their values is simulated
+PARAMETERS = [
+    "grid_size",
+    "palette_size",
+    "word_size",
+    "palette_change_cooldown",
+    "steal_amount",
+    "steal_cooldown",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Plays seeded games between scripted strategies on the Game engine, without websockets, "
+        "over a process pool and reports the length, moves and finish rate of the games "
+        "for every combination of the given parameters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=1000, help="Games per parameter set")
+        parser.add_argument(
+            "--strategies",
+            nargs="+",
+            default=["greedy", "random"],
+            help=f"Strategy of every seat, one of {', '.join(STRATEGIES)}",
+        )
+        parser.add_argument("--grid-size", type=int, nargs="+", default=[10])
+        parser.add_argument("--palette-size", type=int, nargs="+", default=[10])
+        parser.add_argument("--word-size", type=int, nargs="+", default=[5])
+        parser.add_argument("--palette-change-cooldown", type=int, nargs="+", default=[10])
+        parser.add_argument("--steal-amount", type=int, nargs="+", default=[5])
+        parser.add_argument("--steal-cooldown", type=int, nargs="+", default=[10])
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+        parser.add_argument("--move-interval", type=int, default=2)
+        parser.add_argument("--max-moves", type=int, default=500)
+        parser.add_argument(
+            "--max-windows",
+            type=int,
+            default=50,
+            help="Windows of the grid the solver of a greedy move looks at",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--json", action="store_true", help="Print the results as json")
+
+    def handle(self, *args, **options):
+        strategies = options["strategies"]
+        if unknown := set(strategies) - set(STRATEGIES):
+            raise CommandError(f"Unknown strategies: {', '.join(sorted(unknown))}")
+
+        parameter_sets = [
+            dict(zip(PARAMETERS, values))
+            for values in itertools.product(*(options[name] for name in PARAMETERS))
+        ]
+        game_options = {
+            "move_interval": options["move_interval"],
+            "max_moves": options["max_moves"],
+            "max_windows": options["max_windows"],
+        }
+
+        started = time.monotonic()
+        results = []
+        # spawned like the bot workers, forking a process that might hold db connections isn't safe
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            for params in parameter_sets:
+                # the same seeds are played with every parameter set
+                seeds = range(options["seed"], options["seed"] + options["games"])
+                futures = [
+                    executor.submit(
+                        simulate_batch,
+                        params,
+                        strategies,
+                        seeds[i : i + options["batch_size"]],
+                        **game_options,
+                    )
+                    for i in range(0, len(seeds), options["batch_size"])
+                ]
+
+                seconds, moves, outcomes = Counter(), Counter(), Counter()
+                for future in as_completed(futures):
+                    batch = future.result()
+                    seconds.update(batch["seconds"])
+                    moves.update(batch["moves"])
+                    outcomes.update(batch["outcomes"])
+                results.append(self.summarize(params, seconds, moves, outcomes))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for result in results:
+                self.write_result(result)
+
+        played = len(parameter_sets) * options["games"]
+        self.stderr.write(f"Played {played} games in {time.monotonic() - started:.1f}s")
+
+    def summarize(self, params: dict, seconds: Counter, moves: Counter, outcomes: Counter) -> dict:
+        games = outcomes["games"]
+        return {
+            "params": params,
+            "games": games,
+            "finish_rate": outcomes["finished"] / games if games else 0.0,
+            "wins": {
+                key.removeprefix("won_by_"): count
+                for key, count in outcomes.items()
+                if key.startswith("won_by_")
+            },
+            "seconds": {f"p{p}": get_percentile(seconds, p) for p in (50, 90, 99)},
+            "moves": {f"p{p}": get_percentile(moves, p) for p in (50, 90, 99)},
+            "mean_seconds": sum(k * v for k, v in seconds.items()) / games if games else 0.0,
+            "mean_moves": sum(k * v for k, v in moves.items()) / games if games else 0.0,
+        }
+
+    def write_result(self, result: dict) -> None:
+        params = " ".join(f"{name}={value}" for name, value in result["params"].items())
+        seconds, moves = result["seconds"], result["moves"]
+        self.stdout.write(params)
+        self.stdout.write(
+            f"  finish rate {result['finish_rate']:.1%} of {result['games']} games, wins {result['wins']}"
+        )
+        self.stdout.write(
+            f"  seconds mean {result['mean_seconds']:.1f} "
+            f"p50 {seconds['p50']} p90 {seconds['p90']} p99 {seconds['p99']}"
+        )
+        self.stdout.write(
+            f"  moves   mean {result['mean_moves']:.1f} "
+            f"p50 {moves['p50']} p90 {moves['p90']} p99 {moves['p99']}"
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.4 on 2026-10-18 22:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tictactoe', '0004_rename_player_name_playermodel_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameEventModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_uuid', models.UUIDField()),
+                ('seq', models.PositiveIntegerField()),
+                ('event_type', models.IntegerField(choices=[(2000, 'GAME_CREATED'), (2001, 'GAME_RESET'), (2002, 'ROOM_STATE_CHANGED'), (2003, 'PLAYER_JOINED'), (2004, 'PLAYER_LEFT'), (2005, 'LETTER_PLACED'), (2006, 'PALETTE_STOLEN'), (2007, 'PALETTES_CHANGED')])),
+                ('data', models.JSONField()),
+            ],
+            options={
+                'ordering': ['room_uuid', 'seq'],
+                'unique_together': {('room_uuid', 'seq')},
+            },
+        ),
+    ]
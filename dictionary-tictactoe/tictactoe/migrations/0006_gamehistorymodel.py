@@ -0,0 +1,38 @@
+# Generated by Django 4.0.4 on 2026-10-18 22:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tictactoe', '0005_gameeventmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameHistoryModel',
+            fields=[
+                ('room_uuid', models.UUIDField(primary_key=True, serialize=False)),
+                ('room_state', models.IntegerField(choices=[(10, 'IN_LOBBY'), (20, 'GAME_START'), (21, 'GAME_IN_PROGRESS'), (30, 'GAME_ENDED'), (40, 'GAME_ABORTED')])),
+                ('rows', models.PositiveSmallIntegerField()),
+                ('cols', models.PositiveSmallIntegerField()),
+                ('grid', models.BinaryField()),
+                ('player_count', models.PositiveSmallIntegerField()),
+                ('finished_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='gamemodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='playermodel',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.0.4 on 2026-10-18 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tictactoe', '0007_chunk_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('rating', models.FloatField()),
+                ('games', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='gamehistorymodel',
+            name='rated_players',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='gamehistorymodel',
+            name='winner',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamemodel',
+            name='winner',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='playermodel',
+            name='is_bot',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-18 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tictactoe', '0009_reconnect_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamemodel',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-18 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tictactoe', '0010_gamemodel_seed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gameeventmodel',
+            name='event_type',
+            field=models.IntegerField(choices=[(2000, 'GAME_CREATED'), (2001, 'GAME_RESET'), (2002, 'ROOM_STATE_CHANGED'), (2003, 'PLAYER_JOINED'), (2004, 'PLAYER_LEFT'), (2005, 'LETTER_PLACED'), (2006, 'PALETTE_STOLEN'), (2007, 'PALETTES_CHANGED'), (2008, 'CHUNK_CREATED'), (2009, 'PLAYER_RECONNECTED'), (2010, 'WORDS_MADE')]),
+        ),
+    ]
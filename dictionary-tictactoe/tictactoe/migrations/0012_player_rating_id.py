@@ -0,0 +1,23 @@
+# Generated by Django 4.0.4 on 2026-10-18 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tictactoe', '0011_word_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playermodel',
+            name='rating_id',
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True),
+        ),
+        migrations.AlterField(
+            model_name='gamehistorymodel',
+            name='rated_players',
+            field=models.JSONField(default=dict),
+        ),
+    ]
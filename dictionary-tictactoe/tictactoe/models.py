@@ -1,12 +1,16 @@
 from django.db import models
 
-from tictactoe.game import RoomState
+from tictactoe.game import GameEventType, RoomState
 
 # Create your models here.
 
 
 class PlayerModel(models.Model):
     name = models.CharField(unique=True, null=False, blank=False, max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    is_bot = models.BooleanField(default=False)
+    # the name is new on every connection, the rating id stays the same for a player
+    rating_id = models.CharField(null=True, blank=True, max_length=32, db_index=True)
 
 
 class GameModel(models.Model):
@@ -14,3 +18,47 @@ class GameModel(models.Model):
     game_state = models.JSONField()
     players = models.ManyToManyField(PlayerModel)
     room_state = models.IntegerField(choices=RoomState.choices(), default=RoomState.IN_LOBBY)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    winner = models.CharField(null=True, blank=True, max_length=100)
+    # the game is played again exactly with the same seed and the same moves
+    seed = models.BigIntegerField(null=True, blank=True)
+
+
+class GameEventModel(models.Model):
+    # not a foreign key on purpose, the event log is append-only
+    # and has to outlive the GameModel row of the room
+    room_uuid = models.UUIDField()
+    seq = models.PositiveIntegerField()
+    event_type = models.IntegerField(choices=GameEventType.choices())
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ["room_uuid", "seq"]
+        unique_together = [["room_uuid", "seq"]]
+
+
+class GameHistoryModel(models.Model):
+    """Finished games that are moved out of GameModel by the archive_games command"""
+
+    room_uuid = models.UUIDField(primary_key=True)
+    room_state = models.IntegerField(choices=RoomState.choices())
+    rows = models.PositiveSmallIntegerField()
+    cols = models.PositiveSmallIntegerField()
+    # packed with tictactoe.util.matrix.pack_grid
+    grid = models.BinaryField()
+    player_count = models.PositiveSmallIntegerField()
+    # names of the rated players to their rating ids, the ratings are rebuilt from them
+    rated_players = models.JSONField(default=dict)
+    winner = models.CharField(null=True, blank=True, max_length=100)
+    finished_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+class RatingModel(models.Model):
+    """Rating of a player, not a foreign key since the players are pruned with their games.
+    The name is the rating id of the player, see tictactoe.helper.leaderboard.get_rating_id"""
+
+    name = models.CharField(unique=True, max_length=100)
+    rating = models.FloatField()
+    games = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
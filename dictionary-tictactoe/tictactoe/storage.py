@@ -0,0 +1,36 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always written
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprints the static files and writes a .gz, and a .br if brotli is installed,
+    next to every text file so they can be served without compressing them per request"""
+
+    compressed_extensions = (".css", ".js", ".html", ".json", ".svg", ".txt", ".map")
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        for name in {*self.hashed_files.keys(), *self.hashed_files.values()}:
+            if name.endswith(self.compressed_extensions) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name: str) -> None:
+        path = self.path(name)
+        with open(path, "rb") as f:
+            content = f.read()
+
+        with open(f"{path}.gz", "wb") as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+
+        if brotli is not None:
+            with open(f"{path}.br", "wb") as f:
+                f.write(brotli.compress(content))
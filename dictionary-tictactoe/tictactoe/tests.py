@@ -1,3 +1,1011 @@
-from django.test import TestCase
+import asyncio
+import functools
+import gzip
+import json
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db.utils import IntegrityError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from tictactoe.game import Bot, ChunkedBoard, Game, LargeGame, Player, RoomState
+from tictactoe.helper import compression, db, health, leaderboard, mixins, wrappers
+from tictactoe.helper.actor import RoomActor
+from tictactoe.helper.compression import encode_frame
+from tictactoe.helper.cache import ModelCache
+from tictactoe.helper.static import StaticFilesApp
+from tictactoe.models import GameHistoryModel, GameModel, PlayerModel, RatingModel
+from tictactoe.util.generator import _grid_pools, fill_grid_pools, get_ready_grid, get_rng
+from tictactoe.util.matrix import create_grid, pack_grid, unpack_grid
+from tictactoe.util.simulator import get_percentile, simulate_batch, simulate_game
+from tictactoe.util.rating import DEFAULT_RATING, FenwickTree, Leaderboard, rate_game
+from tictactoe.util.palette import LetterDistribution, generate_random_palette
+from tictactoe.util.solver import WordIndex, find_best_move
+
+
+def start_game() -> Game:
+    game = Game()
+    game.create_player("a")
+    game.create_player("b")
+    return game
+
+
+def get_empty_cell(game: Game) -> tuple:
+    return next(
+        (x, y) for x, row in enumerate(game.game_state) for y, cell in enumerate(row) if not cell
+    )
+
+
+class StubChannelLayer:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def group_send(self, group: str, message: dict) -> None:
+        self.sent.append((group, message))
+
+    async def send(self, channel: str, message: dict) -> None:
+        self.sent.append((channel, message))
+
+
+class StubGameManager(mixins.GameManagerMixin):
+    """GameManagerMixin that keeps its models and events in memory instead of the db"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.channel_layer = StubChannelLayer()
+        self.saved = {}
+        self.events = {}
+
+    async def _create_game_model(self, room_group_name: str, *args, **kwargs):
+        return room_group_name
+
+    async def _get_game_model(self, room_group_name: str):
+        return room_group_name if room_group_name in mixins._games else None
+
+    async def _update_game_model(self, game_model, game: Game) -> None:
+        self.saved[game_model] = game.room_state
+
+    async def _append_game_events(self, room_group_name: str, events: list) -> None:
+        self.events.setdefault(room_group_name, []).extend(events)
+
+    async def _create_player_model(self, player_name: str, *args, **kwargs):
+        return player_name
+
+    async def _add_player_model(self, game_model, player_model) -> None:
+        pass
+
+    async def _start_room_sweeper(self) -> None:
+        pass
+
+
+@override_settings(BOT_JOIN_TIMEOUT=None)
+class GameManagerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.manager = StubGameManager()
+
+    def tearDown(self):
+        for game_dict in mixins._games.values():
+            game_dict[mixins.GameStatesEnum.ROOM_ACTOR].stop()
+        mixins._games.clear()
+        for task_dict in mixins._tasks:
+            task_dict["task"].cancel()
+        mixins._tasks.clear()
+
+
+class PlayerTestCase(SimpleTestCase):
+    def test_has_letter(self):
+        player = Player("player", ["A", "B"])
+        self.assertTrue(player.has_letter("A"))
+        self.assertFalse(player.has_letter("C"))
+        self.assertFalse(player.has_letter("AB"))
+        self.assertFalse(player.has_letter(""))
+        self.assertFalse(player.has_letter(None))
+
+    def test_has_letter_outside_of_ascii(self):
+        player = Player("player", ["A", "B"])
+        # ord of these is over 255, they can't be looked up in the palette bytes
+        self.assertFalse(player.has_letter("ş"))
+        self.assertFalse(player.has_letter("😀"))
+        self.assertFalse(player.has_letter("é"))
+
+    def test_palette_is_kept_as_bytes(self):
+        player = Player("player", ["A", "B"])
+        self.assertEqual(player.palette, ["A", "B"])
+        self.assertEqual(player.palette_length, 2)
+        player.add_to_palette(["C"])
+        player.add_to_palette(b"D")
+        self.assertEqual(player.palette, ["A", "B", "C", "D"])
+        player.reset_palette()
+        self.assertEqual((player.palette, player.can_play), ([], True))
+        # slotted, nothing else can be set on a player
+        with self.assertRaises(AttributeError):
+            player.other = 1
+
+
+class RoomActorTestCase(SimpleTestCase):
+    async def test_commands_run_in_order(self):
+        actor = RoomActor(start_game())
+        seen = []
+        await asyncio.gather(*(actor.ask(lambda game, i: seen.append(i), i) for i in range(100)))
+        actor.stop()
+        self.assertEqual(seen, list(range(100)))
+
+    async def test_moves_on_the_same_cell_are_serialized(self):
+        game = start_game()
+        actor = RoomActor(game)
+        x, y = get_empty_cell(game)
+        moves = [
+            actor.ask(Game.update_game, x, y, name, game.get_player(name).palette[0])
+            for name in ["a", "b"]
+        ]
+        results = await asyncio.gather(*moves)
+        actor.stop()
+        self.assertEqual(results, [True, False])
+        self.assertEqual(game.game_state[x][y], game.get_player("a").palette[0])
+
+    async def test_exceptions_are_raised_to_the_caller(self):
+        actor = RoomActor(start_game())
+        # not assertRaises, it clears the frames of the traceback and with them the runner's
+        try:
+            await actor.ask(lambda game: 1 / 0)
+        except ZeroDivisionError:
+            pass
+        else:
+            self.fail("ZeroDivisionError isn't raised")
+        # the runner keeps going after a failed command
+        self.assertEqual(await actor.ask(lambda game: game.room_state), RoomState.GAME_IN_PROGRESS)
+        actor.stop()
+
+    async def test_stop_cancels_the_waiting_commands(self):
+        actor = RoomActor(start_game())
+        command = asyncio.ensure_future(actor.ask(lambda game: game.room_state))
+        # the command is in the mailbox, but the runner hasn't got to it yet
+        await asyncio.sleep(0)
+        actor.stop()
+        self.assertFalse(actor.is_running)
+        await asyncio.wait([command])
+        self.assertTrue(command.cancelled())
+
+
+class ReplayTestCase(SimpleTestCase):
+    def test_replay_rebuilds_the_game(self):
+        game = start_game()
+        x, y = get_empty_cell(game)
+        game.update_game(x, y, "a", game.get_player("a").palette[0])
+        game.rotate_palettes()
+        # the cooldown of the thief is over
+        game.get_player("b").steal_timer = 0
+        self.assertTrue(game.steal_palette("b", "a"))
+        events = game.pop_pending_events()
+
+        replayed = Game.replay(events)
+        self.assertEqual(replayed.seq, game.seq)
+        self.assertEqual(replayed.room_state, game.room_state)
+        self.assertEqual(replayed.game_state, game.game_state)
+        self.assertEqual(replayed.get_players(), game.get_players())
+        self.assertEqual(replayed.pending_events, [])
+
+    def test_replay_until_seq(self):
+        game = Game()
+        grid = [row[:] for row in game.game_state]
+        game.create_player("a")
+        game.create_player("b")
+        x, y = get_empty_cell(game)
+        game.update_game(x, y, "a", game.get_player("a").palette[0])
+        events = game.pop_pending_events()
+
+        replayed = Game.replay(events, until_seq=events[-2]["seq"])
+        self.assertEqual(replayed.seq, events[-2]["seq"])
+        self.assertEqual(replayed.game_state, grid)
+        self.assertEqual(len(replayed.players), 2)
+
+    def test_events_are_popped_once(self):
+        game = start_game()
+        events = game.pop_pending_events()
+        self.assertEqual([event["seq"] for event in events], list(range(1, game.seq + 1)))
+        self.assertEqual(game.pop_pending_events(), [])
+
+
+class PaletteTestCase(SimpleTestCase):
+    def test_palette_has_distinct_letters(self):
+        palette = generate_random_palette(26)
+        self.assertEqual(sorted(palette), [chr(ord("A") + i) for i in range(26)])
+        with self.assertRaises(ValueError):
+            generate_random_palette(27)
+
+    def test_grid_boosts_the_letters_of_common_bigrams(self):
+        distribution = LetterDistribution(frozenset(["qu", "qua"]))
+        self.assertEqual(distribution.get_weights(), distribution.letters)
+
+        # U is the only letter that comes after Q, and A is the only one after U
+        weights = distribution.get_weights([["Q", ""], ["", ""]])
+        self.assertEqual(weights["U"], distribution.letters["U"] * 2)
+        self.assertEqual(weights["A"], distribution.letters["A"])
+        # a full grid has no empty cell to boost
+        self.assertEqual(distribution.get_weights([["Q", "U"], ["A", "Q"]]), distribution.letters)
+
+    def test_grid_is_weighted_once_per_rotation(self):
+        game = Game(seed=42, max_players=3)
+        for name in ["a", "b", "c"]:
+            game.create_player(name)
+        replayed = Game.replay(game.pending_events)
+
+        get_weights = LetterDistribution.get_weights
+        with mock.patch.object(
+            LetterDistribution, "get_weights", autospec=True, side_effect=get_weights
+        ) as weights:
+            game.rotate_palettes()
+        self.assertEqual(weights.call_count, 1)
+
+        # the weights are the same ones every palette used to compute for itself
+        rng = replayed.get_random()
+        palettes = [generate_random_palette(10, replayed.game_state, rng) for _ in range(3)]
+        self.assertEqual([player.palette for player in game.players.values()], palettes)
+
+
+class SolverTestCase(SimpleTestCase):
+    def test_count_matches(self):
+        index = WordIndex(frozenset(["apple", "angle", "bread", "toolong"]), 5)
+        self.assertEqual(index.count_matches([""] * 5), 3)
+        self.assertEqual(index.count_matches(["A", "", "", "L", "E"]), 2)
+        self.assertEqual(index.count_matches(["B", "", "", "", ""]), 1)
+        self.assertEqual(index.count_matches(["", "", "", "", "Z"]), 0)
+        # a letter that isn't in any word at that position
+        self.assertEqual(index.count_matches(["Q", "P", "", "", ""]), 0)
+        # more than one letter that isn't in any word at its position
+        self.assertEqual(index.count_matches(["Q", "Z", "", "", "X"]), 0)
+
+    def test_find_best_move_completes_a_word(self):
+        game_state = [[""] * 5 for _ in range(5)]
+        game_state[0][:4] = list("APPL")
+        self.assertEqual(find_best_move(game_state, ["X", "E"], 5), (0, 4, "E"))
+
+    def test_find_best_move_within_a_window_budget(self):
+        game_state = [[""] * 5 for _ in range(5)]
+        game_state[0][:4] = list("APPL")
+        # the fullest windows are looked at first
+        move = find_best_move(game_state, ["X", "E"], 5, time_budget=None, max_windows=1)
+        self.assertEqual(move, (0, 4, "E"))
+
+    def test_find_best_move_on_a_full_grid(self):
+        game_state = [["X"] * 5 for _ in range(5)]
+        self.assertIsNone(find_best_move(game_state, ["E"], 5))
+
+    def test_bot_is_replayed_as_a_bot(self):
+        game = Game()
+        game.create_player("a")
+        game.create_player("bot", Bot)
+        replayed = Game.replay(game.pop_pending_events())
+        self.assertTrue(replayed.get_player("bot").is_bot)
+        self.assertFalse(replayed.get_player("a").is_bot)
+
+
+class HealthTestCase(SimpleTestCase):
+    def tearDown(self):
+        health._server_state["draining"] = False
+
+    def test_draining_worker_isnt_ready(self):
+        self.assertEqual(self.client.get("/healthz").json()["status"], "alive")
+        self.assertEqual(self.client.get("/readyz").json()["status"], "ready")
+
+        health.start_draining()
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "draining")
+        # a draining worker is still alive
+        self.assertEqual(self.client.get("/healthz").status_code, 200)
+
+
+class EvictionTestCase(GameManagerTestCase):
+    @override_settings(ROOM_ENDED_TTL=0, ROOM_IDLE_TTL=60)
+    async def test_sweep_evicts_ended_and_idle_rooms(self):
+        for room_group_name in ["room_ended", "room_idle", "room_active"]:
+            await self.manager.get_or_create_game(room_group_name)
+        actor = await self.manager._get_actor("room_ended")
+        await actor.ask(Game.change_room_state, RoomState.GAME_ENDED)
+        mixins._games["room_idle"][mixins.GameStatesEnum.LAST_ACTIVE] -= 61
+
+        await self.manager.sweep_games()
+        self.assertEqual(list(mixins._games), ["room_active"])
+        # the evicted rooms are saved with their events
+        self.assertEqual(self.manager.saved["room_ended"], RoomState.GAME_ENDED)
+        self.assertEqual(self.manager.saved["room_idle"], RoomState.IN_LOBBY)
+        self.assertEqual(
+            self.manager.events["room_ended"][-1]["data"]["room_state"], RoomState.GAME_ENDED
+        )
+        self.assertNotIn("room_active", self.manager.events)
+
+    @override_settings(ROOM_MAX_RESIDENT=3)
+    async def test_least_recently_used_lobbies_are_evicted_over_the_cap(self):
+        for room_group_name in ["room_1", "room_2", "room_3"]:
+            await self.manager.get_or_create_game(room_group_name)
+        # room_1 is used after room_2, room_3 is in progress
+        await self.manager.create_player("room_3", "a")
+        await self.manager.create_player("room_3", "b")
+        await self.manager._get_actor("room_1")
+
+        await self.manager.get_or_create_game("room_4")
+        self.assertCountEqual(mixins._games, ["room_1", "room_3", "room_4"])
+
+        await self.manager.get_or_create_game("room_5")
+        self.assertCountEqual(mixins._games, ["room_3", "room_4", "room_5"])
+
+    async def test_evict_closes_the_room(self):
+        await self.manager.get_or_create_game("room_1")
+        await self.manager.create_player("room_1", "a")
+        await self.manager.evict_game("room_1")
+        self.assertNotIn("room_1", mixins._games)
+        self.assertIn(("room_1", {"type": "close_room"}), self.manager.channel_layer.sent)
+        self.assertEqual(await self.manager.remove_player_from_game("room_1", "a"), (None, None))
+
+    async def test_room_stats_are_taken_by_the_sweep(self):
+        await self.manager.get_or_create_game("room_1")
+        await self.manager.get_or_create_game("room_2")
+        await self.manager.sweep_games()
+        stats = mixins.get_room_stats()
+        self.assertEqual(stats["states"], {"IN_LOBBY": 2})
+        self.assertGreater(stats["bytes"], 0)
+
+        # the snapshot is only refreshed by the next sweep, the count is current
+        await self.manager.evict_game("room_2")
+        self.assertEqual(mixins.get_room_stats(), {**stats, "rooms": 1})
+
+
+@override_settings(DB_POOL_SIZE=1)
+class DBPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        self.executor, db._db_executor = db._db_executor, None
+        self.stats = dict(db._pool_stats)
+
+    def tearDown(self):
+        db._db_executor.shutdown()
+        db._db_executor = self.executor
+        db._pool_stats.update(self.stats)
+
+    async def test_waiting_calls_are_counted(self):
+        release = threading.Event()
+        calls = db.get_db_pool_stats()["calls"]
+        # the only thread of the pool is busy until the event is set
+        first = asyncio.ensure_future(db.database_pool_to_async(release.wait)(5))
+        second = asyncio.ensure_future(db.database_pool_to_async(lambda: "done")())
+        await asyncio.sleep(0.05)
+        self.assertEqual(db.get_db_pool_stats()["waiting"], 1)
+
+        release.set()
+        self.assertEqual(await second, "done")
+        self.assertTrue(await first)
+        stats = db.get_db_pool_stats()
+        self.assertEqual(stats["waiting"], 0)
+        self.assertEqual(stats["calls"], calls + 2)
+        self.assertGreater(stats["wait_max"], 0)
+
+    async def test_cancelled_calls_stop_waiting(self):
+        release = threading.Event()
+        first = asyncio.ensure_future(db.database_pool_to_async(release.wait)(5))
+        second = asyncio.ensure_future(db.database_pool_to_async(lambda: "done")())
+        await asyncio.sleep(0.05)
+        second.cancel()
+        await asyncio.wait([second])
+        self.assertEqual(db.get_db_pool_stats()["waiting"], 0)
+
+        release.set()
+        await first
+        self.assertEqual(db.get_db_pool_stats()["waiting"], 0)
+
+
+class ModelCacheTestCase(GameManagerTestCase):
+    def tearDown(self):
+        super().tearDown()
+        mixins._game_model_cache.invalidate("room_1")
+
+    def test_least_recently_used_model_is_dropped(self):
+        cache = ModelCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+
+        cache.invalidate("a")
+        self.assertIsNone(cache.get("a"))
+        stats = cache.get_stats()
+        self.assertEqual((stats["size"], stats["hits"], stats["misses"]), (1, 3, 2))
+        self.assertEqual(stats["hit_rate"], 0.6)
+
+    def test_model_expires_after_its_ttl(self):
+        cache = ModelCache(2, ttl=60)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get_stats()["size"], 0)
+
+    async def test_game_model_is_read_through_the_cache(self):
+        queries = []
+
+        async def query_game_model(room_group_name):
+            queries.append(room_group_name)
+            return "queried"
+
+        self.manager._query_game_model = query_game_model
+        get_game_model = mixins.DBObjectsMixin._get_game_model
+        self.assertEqual(await get_game_model(self.manager, "room_1"), "queried")
+
+        mixins._game_model_cache.set("room_1", "cached")
+        self.assertEqual(await get_game_model(self.manager, "room_1"), "cached")
+        self.assertEqual(queries, ["room_1"])
+
+    async def test_evicted_room_is_dropped_from_the_cache(self):
+        await self.manager.get_or_create_game("room_1")
+        mixins._game_model_cache.set("room_1", "cached")
+        await self.manager.evict_game("room_1")
+        self.assertIsNone(mixins._game_model_cache.get("room_1"))
+
+
+class MatrixTestCase(SimpleTestCase):
+    def test_pack_grid_round_trip(self):
+        grid = create_grid(7, 9, letter_chance=50)
+        self.assertEqual(unpack_grid(pack_grid(grid), 7, 9), grid)
+
+    def test_pack_empty_grid(self):
+        grid = [[""] * 4 for _ in range(3)]
+        self.assertEqual(unpack_grid(pack_grid(grid), 3, 4), grid)
+
+
+class ArchiveGamesTestCase(TestCase):
+    def create_game(self, room_state: RoomState, hours_ago: float) -> GameModel:
+        game_model = GameModel.objects.create(
+            room_uuid=uuid.uuid4(), game_state=create_grid(5, 5), room_state=room_state
+        )
+        updated_at = timezone.now() - timedelta(hours=hours_ago)
+        GameModel.objects.filter(pk=game_model.pk).update(updated_at=updated_at)
+        return game_model
+
+    def test_old_finished_games_are_archived(self):
+        ended = self.create_game(RoomState.GAME_ENDED, 48)
+        ended.players.add(PlayerModel.objects.create(name="a"))
+        recent = self.create_game(RoomState.GAME_ENDED, 1)
+        in_progress = self.create_game(RoomState.GAME_IN_PROGRESS, 48)
+        orphan = PlayerModel.objects.create(name="b")
+        PlayerModel.objects.filter(pk=orphan.pk).update(
+            created_at=timezone.now() - timedelta(hours=48)
+        )
+
+        call_command("archive_games", stdout=StringIO())
+        self.assertEqual(
+            set(GameModel.objects.values_list("room_uuid", flat=True)),
+            {recent.room_uuid, in_progress.room_uuid},
+        )
+        history = GameHistoryModel.objects.get(room_uuid=ended.room_uuid)
+        self.assertEqual(unpack_grid(bytes(history.grid), 5, 5), ended.game_state)
+        self.assertEqual((history.room_state, history.player_count), (RoomState.GAME_ENDED, 1))
+        self.assertEqual(list(PlayerModel.objects.values_list("name", flat=True)), ["a"])
+
+    def test_archived_room_isnt_created_again(self):
+        ended = self.create_game(RoomState.GAME_ENDED, 48)
+        call_command("archive_games", stdout=StringIO())
+
+        # the sync body, the db pool threads don't see the transaction of the test
+        create_game_model = mixins.DBObjectsMixin._create_game_model.__wrapped__
+        with self.assertRaises(IntegrityError):
+            create_game_model(None, f"room_{ended.room_uuid}", create_grid(5, 5))
+        self.assertFalse(GameModel.objects.filter(room_uuid=ended.room_uuid).exists())
+
+
+class StaticFilesTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name) / "static"
+        self.root.mkdir()
+        (self.root / "app.0123456789ab.js").write_text("let a = 1;")
+        (self.root / "app.0123456789ab.js.gz").write_bytes(gzip.compress(b"let a = 1;"))
+        (Path(directory.name) / "secret.txt").write_text("secret")
+        self.passed = []
+        self.app = StaticFilesApp(self.fallback, root=self.root, prefix="/static/")
+
+    async def fallback(self, scope, receive, send):
+        self.passed.append(scope["path"])
+
+    async def request(self, path: str, method: str = "GET", **headers) -> tuple:
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()
+            ],
+        }
+        await self.app(scope, None, send)
+        if not messages:
+            return None, {}, None
+        return messages[0]["status"], dict(messages[0]["headers"]), messages[1]["body"]
+
+    async def test_file_is_served_with_its_etag(self):
+        status, headers, body = await self.request("/static/app.0123456789ab.js")
+        self.assertEqual((status, body), (200, b"let a = 1;"))
+        self.assertIn(b"immutable", headers[b"cache-control"])
+        self.assertEqual(headers[b"vary"], b"Accept-Encoding")
+        self.assertNotIn(b"content-encoding", headers)
+
+        status, _, body = await self.request(
+            "/static/app.0123456789ab.js", if_none_match=headers[b"etag"].decode()
+        )
+        self.assertEqual((status, body), (304, b""))
+
+    async def test_precompressed_variant_is_served(self):
+        status, headers, body = await self.request(
+            "/static/app.0123456789ab.js", accept_encoding="gzip, deflate"
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-encoding"], b"gzip")
+        self.assertEqual(gzip.decompress(body), b"let a = 1;")
+
+        status, headers, body = await self.request("/static/app.0123456789ab.js", method="HEAD")
+        self.assertEqual((status, body), (200, b""))
+        self.assertEqual(headers[b"content-length"], b"10")
+
+    async def test_missing_and_outside_files_are_passed_on(self):
+        for path in ["/static/missing.js", "/static/../secret.txt", "/other/app.js"]:
+            self.assertEqual(await self.request(path), (None, {}, None))
+        self.assertEqual(
+            self.passed, ["/static/missing.js", "/static/../secret.txt", "/other/app.js"]
+        )
+
+
+class LargeGameTestCase(SimpleTestCase):
+    def test_chunks_are_created_when_they_are_used(self):
+        board = ChunkedBoard(100, chunk_size=32)
+        self.assertEqual(board.get_chunk_keys(-5, 40, 33, 70), [(0, 1), (0, 2), (1, 1), (1, 2)])
+        # the rectangle is clamped to the board
+        self.assertEqual(board.get_chunk_keys(90, 90, 500, 500), [(2, 2), (2, 3), (3, 2), (3, 3)])
+        self.assertEqual(board.get(40, 40), "")
+        self.assertFalse(board.has_chunk((1, 1)))
+
+        board.set(40, 40, "A")
+        self.assertEqual(board.get(40, 40), "A")
+        self.assertEqual(board.get(100, 40), "")
+        self.assertEqual(list(board.chunks), [(1, 1)])
+
+    def test_replay_rebuilds_the_chunks(self):
+        game = LargeGame(grid_size=128, chunk_size=32)
+        game.create_player("a")
+        self.assertEqual(game.room_state, RoomState.GAME_IN_PROGRESS)
+        self.assertIsNotNone(game.create_player("b"))
+        chunks = game.get_chunks([(0, 0), (3, 3)])
+        x, y = next(
+            (x, y) for x, row in enumerate(chunks[(3, 3)]) for y, cell in enumerate(row) if not cell
+        )
+        self.assertTrue(game.update_game(96 + x, 96 + y, "b", game.get_player("b").palette[0]))
+
+        replayed = LargeGame.replay(game.pop_pending_events())
+        self.assertEqual(replayed.board.chunk_size, 32)
+        self.assertEqual(replayed.board.chunks, game.board.chunks)
+        self.assertEqual(replayed.last_move, (96 + x, 96 + y))
+        self.assertEqual(replayed.get_players(), game.get_players())
+
+    def test_words_are_scored_and_the_board_keeps_going(self):
+        game = LargeGame(grid_size=64, chunk_size=32)
+        game.create_player("a")
+        game.create_player("b")
+        game.board.set_chunk((0, 0), create_grid(32, 32, letter_chance=0))
+        for y, letter in enumerate("HOUS"):
+            game.board.set(0, y, letter)
+        self.assertEqual(game.find_words(0, 3), [])
+
+        game.get_player("a").palette = list("EXY")
+        self.assertEqual(game.place_letter(0, 4, "a", "E"), ["house"])
+        self.assertEqual(game.find_words(0, 2), ["house"])
+        self.assertEqual(game.scores, {"a": 5})
+        self.assertEqual(game.room_state, RoomState.GAME_IN_PROGRESS)
+        # the cell is taken now
+        self.assertIsNone(game.place_letter(0, 4, "a", "X"))
+
+        replayed = LargeGame.replay(game.pop_pending_events())
+        self.assertEqual(replayed.scores, {"a": 5})
+
+
+class BoardRestoreTestCase(GameManagerTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # the rows of the evicted rooms stay in the db with their events
+        async def get_game_model(room_group_name):
+            return room_group_name if room_group_name in self.manager.saved else None
+
+        async def get_game_events(room_group_name, until_seq=None):
+            return json.loads(json.dumps(self.manager.events.get(room_group_name, [])))
+
+        self.manager._get_game_model = get_game_model
+        self.manager._get_game_events = get_game_events
+
+    async def test_evicted_board_is_restored_from_its_events(self):
+        create_board = functools.partial(LargeGame, grid_size=64, chunk_size=32)
+        board, _ = await self.manager.get_or_create_game("board_1", create_board)
+        await self.manager.create_player("board_1", "a")
+        chunks = await self.manager.get_chunks("board_1", [(0, 0)])
+        await self.manager.evict_game("board_1")
+
+        restored, game_model = await self.manager.get_or_create_game("board_1", create_board)
+        self.assertIsNot(restored, board)
+        self.assertEqual(game_model, "board_1")
+        self.assertEqual(restored.board.chunks, chunks)
+        # a's connection went with the worker, the board is open for new players
+        self.assertEqual(restored.players, {})
+        self.assertEqual(restored.room_group_name, "board_1")
+        self.assertIsNotNone(await self.manager.create_player("board_1", "b"))
+        self.assertEqual(restored.room_state, RoomState.GAME_IN_PROGRESS)
+
+    async def test_room_isnt_restored(self):
+        await self.manager.get_or_create_game("room_1")
+        await self.manager.evict_game("room_1")
+        self.assertIsNone(await self.manager._restore_board("room_1", "room_1"))
+        self.assertNotIn("room_1", mixins._games)
+
+
+class RoomOfManyPlayersTestCase(SimpleTestCase):
+    def start_game(self, players: int) -> Game:
+        game = Game(max_players=players)
+        for i in range(players):
+            self.assertEqual(game.room_state, RoomState.IN_LOBBY)
+            game.create_player(f"player_{i}")
+        self.assertIsNone(game.create_player("late"))
+        return game
+
+    def test_room_keeps_going_while_two_players_are_left(self):
+        game = self.start_game(3)
+        self.assertEqual(game.room_state, RoomState.GAME_IN_PROGRESS)
+        grid = [row[:] for row in game.game_state]
+
+        game.remove_player("player_1")
+        self.assertEqual(game.room_state, RoomState.GAME_IN_PROGRESS)
+        self.assertEqual(game.game_state, grid)
+        self.assertEqual(list(game.players), ["player_0", "player_2"])
+
+        game.remove_player("player_0")
+        self.assertEqual(game.room_state, RoomState.IN_LOBBY)
+        game.remove_player("player_2")
+        self.assertEqual(game.room_state, RoomState.GAME_ABORTED)
+
+    def test_steal_target_is_the_largest_palette_after_the_thief(self):
+        game = self.start_game(4)
+        for i, size in enumerate([3, 5, 2, 5]):
+            game.get_player(f"player_{i}").palette = list("ABCDE"[:size])
+
+        self.assertEqual(game.get_steal_target("player_2").name, "player_3")
+        self.assertEqual(game.get_steal_target("player_0").name, "player_1")
+        self.assertEqual(game.get_steal_target("player_3").name, "player_1")
+        self.assertIsNone(game.get_steal_target("nobody"))
+
+        for player in game.players.values():
+            player.palette = []
+        self.assertIsNone(game.get_steal_target("player_0"))
+
+    def test_steal_from_the_picked_target(self):
+        game = self.start_game(3)
+        thief = game.get_player("player_0")
+        thief.steal_timer = 0
+        game.get_player("player_1").palette = ["A"]
+        self.assertTrue(game.steal_palette("player_0"))
+        self.assertEqual(
+            game.pending_events[-1]["data"], {"thief": "player_0", "victim": "player_2"}
+        )
+        self.assertFalse(game.get_player("player_2").can_play)
+
+
+class RatingTestCase(SimpleTestCase):
+    def test_rate_game(self):
+        ratings = rate_game({}, "a", ["a", "b"])
+        self.assertAlmostEqual(ratings["a"], DEFAULT_RATING + 16)
+        self.assertAlmostEqual(ratings["b"], DEFAULT_RATING - 16)
+
+        # an upset is worth more than a win over a weaker player
+        upset = rate_game({"a": 1400, "b": 1600}, "a", ["a", "b"])
+        expected = rate_game({"a": 1600, "b": 1400}, "a", ["a", "b"])
+        self.assertGreater(upset["a"] - 1400, expected["a"] - 1600)
+
+        # the ratings only move between the players
+        ratings = rate_game({"a": 1500, "b": 1700, "c": 1300}, "b", ["a", "b", "c"])
+        self.assertAlmostEqual(sum(ratings.values()), 4500)
+
+    def test_rate_game_that_cant_be_rated(self):
+        self.assertEqual(rate_game({}, "a", ["a"]), {})
+        self.assertEqual(rate_game({}, "c", ["a", "b"]), {})
+
+    def test_fenwick_tree(self):
+        tree = FenwickTree(10)
+        for index, delta in [(0, 1), (3, 2), (9, 5), (3, -1)]:
+            tree.add(index, delta)
+        self.assertEqual([tree.prefix_sum(i) for i in [0, 2, 3, 8, 9]], [1, 1, 2, 2, 7])
+
+    def test_leaderboard_rank(self):
+        board = Leaderboard()
+        for name, rating in [("a", 1500), ("b", 1600.4), ("c", 1600.9), ("d", 1400)]:
+            board.set(name, rating)
+        # b and c share the 1600 bucket and their rank
+        self.assertEqual([board.get_rank(name) for name in "abcd"], [3, 1, 1, 4])
+        self.assertIsNone(board.get_rank("e"))
+
+        board.set("d", 1700)
+        self.assertEqual([board.get_rank(name) for name in "abcd"], [4, 2, 2, 1])
+        self.assertEqual(board.get_top(3), [(1, "d", 1700), (2, "c", 1600.9), (2, "b", 1600.4)])
+        self.assertEqual(len(board), 4)
+
+    def test_winning_move_returns_the_rating_ids(self):
+        game = Game()
+        game.create_player("a", functools.partial(Player, rating_id="id_a"))
+        game.create_player("bot", Bot)
+        game.create_player("late", functools.partial(Player, rating_id="id_late"))
+        game.game_state = [[""] * 10 for _ in range(10)]
+        game.game_state[0][:4] = list("APPL")
+        game.get_player("a").palette = list("EXY")
+
+        self.assertIsNone(mixins._apply_move(game, 5, 5, "a", "X")[3])
+        is_updated, is_finished, _, rating_ids = mixins._apply_move(game, 0, 4, "a", "E")
+        self.assertTrue(is_updated and is_finished)
+        # the bot isn't rated, the late player never got a seat
+        self.assertEqual(rating_ids, ("id_a", ["id_a"]))
+
+
+class LeaderboardTestCase(TestCase):
+    def setUp(self):
+        leaderboard._leaderboard = None
+        leaderboard._games_played.clear()
+        leaderboard._pending.clear()
+        self.addCleanup(setattr, leaderboard, "_leaderboard", None)
+
+    def test_ratings_are_written_in_batches(self):
+        RatingModel.objects.create(name="a", rating=1600, games=3)
+        leaderboard.record_game_result("b", ["a", "b"])
+        board = leaderboard.get_leaderboard()
+        # the loaded rating of a is the one the game is rated with
+        self.assertEqual((board.get_rank("a"), board.get_rank("b")), (1, 2))
+
+        with self.settings(RATING_BATCH_SIZE=3):
+            self.assertEqual(leaderboard.flush_ratings(), 0)
+            self.assertEqual(leaderboard.flush_ratings(force=True), 2)
+        ratings = dict(RatingModel.objects.values_list("name", "games"))
+        self.assertEqual(ratings, {"a": 4, "b": 1})
+        self.assertLess(RatingModel.objects.get(name="a").rating, 1600)
+
+    def test_rating_id_is_kept_in_a_signed_token(self):
+        rating_id, token = leaderboard.get_rating_id()
+        self.assertEqual(leaderboard.get_rating_id(token), (rating_id, token))
+        self.assertNotEqual(leaderboard.get_rating_id(token + "x")[0], rating_id)
+
+    def test_players_are_rated_under_their_rating_ids(self):
+        leaderboard.record_game_result("id_b", ["id_a", "id_b"])
+        response = leaderboard.read_leaderboard(10, "id_a")
+        self.assertEqual([player["name"] for player in response["top"]], ["id_b", "id_a"])
+        self.assertEqual(response["player"]["rank"], 2)
+        self.assertIsNone(leaderboard.read_leaderboard(10, "nobody")["player"]["rank"])
+
+        # a reconnected player is in the game under two names, the old games list only names
+        rated_players = {"x": "id_a", "y": "id_b", "z": "id_b"}
+        self.assertEqual(leaderboard._get_rated_ids("z", rated_players), ("id_b", ["id_a", "id_b"]))
+        self.assertEqual(leaderboard._get_rated_ids("x", ["x", "y"]), ("x", ["x", "y"]))
+
+    def test_player_is_asked_for_with_its_token(self):
+        rating_id, token = leaderboard.get_rating_id()
+        leaderboard.record_game_result(rating_id, [rating_id, "id_b"])
+        response = self.client.get("/leaderboard", {"player": token}).json()
+        self.assertEqual(response["player"]["rank"], 1)
+
+        # a raw rating id isn't a token
+        self.assertNotIn("player", self.client.get("/leaderboard", {"player": "id_b"}).json())
+
+
+class SimulatorTestCase(SimpleTestCase):
+    params = {"grid_size": 6, "palette_size": 8, "word_size": 3}
+
+    def test_same_seed_plays_the_same_game(self):
+        results = [simulate_game(self.params, ["random", "random"], seed=7) for _ in range(2)]
+        self.assertEqual(results[0], results[1])
+        self.assertLessEqual(results[0]["moves"], 36)
+
+    def test_greedy_games_dont_depend_on_the_clock(self):
+        results = [
+            simulate_game(self.params, ["greedy", "thief"], seed=7, max_windows=5) for _ in range(2)
+        ]
+        self.assertEqual(results[0], results[1])
+
+    def test_batch_counts_every_game(self):
+        batch = simulate_batch(self.params, ["random", "random"], range(5), max_moves=10)
+        self.assertEqual(batch["outcomes"]["games"], 5)
+        self.assertEqual(sum(batch["moves"].values()), 5)
+        self.assertLessEqual(max(batch["moves"]), 10)
+
+    def test_get_percentile(self):
+        histogram = Counter({1: 50, 2: 40, 10: 10})
+        self.assertEqual([get_percentile(histogram, p) for p in (50, 90, 99, 100)], [1, 2, 10, 10])
+        self.assertEqual(get_percentile(Counter(), 50), 0)
+
+
+class SessionTestCase(GameManagerTestCase):
+    def tearDown(self):
+        super().tearDown()
+        mixins._sessions.clear()
+        mixins._session_tokens.clear()
+        mixins._room_sessions.clear()
+
+    async def start_room(self) -> str:
+        await self.manager.get_or_create_game("room_1")
+        await self.manager.create_player("room_1", "a")
+        await self.manager.create_player("room_1", "b")
+        return self.manager.create_session("room_1", "a")
+
+    def test_reconnected_player_keeps_its_seat_in_replays(self):
+        game = start_game()
+        palette = game.get_player("a").palette
+        self.assertIsNone(game.reconnect_player("a", "b"))
+        self.assertEqual(game.reconnect_player("a", "c").palette, palette)
+        self.assertEqual(list(game.players), ["c", "b"])
+
+        replayed = Game.replay(game.pending_events)
+        self.assertEqual(list(replayed.players), ["c", "b"])
+        self.assertEqual(replayed.get_player("c").palette, palette)
+
+    @override_settings(SESSION_GRACE_PERIOD=60)
+    async def test_held_seat_is_resumed(self):
+        token = await self.start_room()
+        # nothing is held for a player without a session
+        self.assertFalse(await self.manager.hold_seat("room_1", "b"))
+        # the seat is only taken back while it is held
+        self.assertIsNone(await self.manager.resume_session("room_1", token, "c"))
+
+        self.assertTrue(await self.manager.hold_seat("room_1", "a"))
+        self.assertIsNone(await self.manager.resume_session("room_2", token, "c"))
+        player = await self.manager.resume_session("room_1", token, "c")
+        self.assertEqual(player.name, "c")
+        self.assertEqual(mixins._session_tokens, {"c": token})
+        self.assertIsNone(mixins._sessions[token]["timer"])
+
+        game = await self.manager._get_game("room_1")
+        self.assertEqual(list(game.players), ["c", "b"])
+        self.assertEqual(game.room_state, RoomState.GAME_IN_PROGRESS)
+
+    @override_settings(SESSION_GRACE_PERIOD=0.01)
+    async def test_player_is_removed_when_the_seat_expires(self):
+        token = await self.start_room()
+        self.assertTrue(await self.manager.hold_seat("room_1", "a"))
+        await asyncio.sleep(0.1)
+
+        game = await self.manager._get_game("room_1")
+        self.assertEqual(list(game.players), ["b"])
+        self.assertNotIn(token, mixins._sessions)
+        self.assertIn(
+            (
+                "room_1",
+                {
+                    "type": "notify_player_disconnected",
+                    "message": "a",
+                    "room_state": RoomState.IN_LOBBY,
+                },
+            ),
+            self.manager.channel_layer.sent,
+        )
+        self.assertIsNone(await self.manager.resume_session("room_1", token, "c"))
+
+    @override_settings(SESSION_GRACE_PERIOD=60)
+    async def test_sessions_are_dropped_with_the_room(self):
+        token = await self.start_room()
+        self.manager.create_session("room_1", "b")
+        self.assertTrue(await self.manager.hold_seat("room_1", "a"))
+        timer = mixins._sessions[token]["timer"]
+
+        await self.manager.evict_game("room_1")
+        self.assertEqual((mixins._sessions, mixins._session_tokens), ({}, {}))
+        self.assertEqual(mixins._room_sessions, {})
+        self.assertTrue(timer.cancelled())
+
+    @override_settings(SESSION_GRACE_PERIOD=60)
+    async def test_held_player_is_removed_when_the_room_is_over(self):
+        await self.start_room()
+        self.manager.create_session("room_1", "b")
+        self.manager.create_session("room_2", "c")
+        self.assertTrue(await self.manager.hold_seat("room_1", "a"))
+
+        actor = await self.manager._get_actor("room_1")
+
+        @wrappers.cancel_tasks_on_room_state_change
+        async def end_game(manager, room_group_name):
+            await actor.ask(Game.change_room_state, RoomState.GAME_ENDED)
+
+        await end_game(self.manager, "room_1")
+        # a doesn't stay in the room as a ghost of the next game, b is still connected
+        game = await self.manager._get_game("room_1")
+        self.assertEqual(list(game.players), ["b"])
+        self.assertEqual(self.manager.channel_layer.sent, [])
+        self.assertEqual(list(mixins._session_tokens), ["c"])
+        self.assertEqual(list(mixins._room_sessions), ["room_2"])
+
+    async def test_session_is_dropped_when_the_seat_isnt_held(self):
+        await self.start_room()
+        with self.settings(SESSION_GRACE_PERIOD=None):
+            self.assertFalse(await self.manager.hold_seat("room_1", "a"))
+        self.assertEqual(mixins._session_tokens, {})
+
+
+class CompressionTestCase(SimpleTestCase):
+    @override_settings(WS_COMPRESSION_MIN_SIZE=100)
+    def test_frames_over_the_threshold_are_compressed(self):
+        small = {"type": "JOINED", "message": "a"}
+        self.assertEqual(encode_frame(small), {"text_data": json.dumps(small)})
+
+        large = {"type": "GAME_STATE", "message": "A" * 100}
+        frame = encode_frame(large)
+        self.assertEqual(list(frame), ["bytes_data"])
+        self.assertEqual(json.loads(zlib.decompress(frame["bytes_data"])), large)
+
+    @override_settings(WS_COMPRESSION_MIN_SIZE=None)
+    def test_compression_can_be_turned_off(self):
+        self.assertIn("text_data", encode_frame({"message": "A" * 10000}))
+
+    def test_stats_without_compressed_frames(self):
+        with mock.patch.dict(compression._compression_stats, {"compressed_frames": 0}):
+            stats = compression.get_compression_stats()
+        self.assertNotIn("compress_seconds", stats)
+        self.assertEqual(stats["compress_ms_avg"], 0.0)
+
+
+class GeneratorTestCase(SimpleTestCase):
+    def tearDown(self):
+        _grid_pools.clear()
+
+    def test_same_seed_makes_the_same_game(self):
+        games = [Game(seed=42) for _ in range(2)]
+        for game in games:
+            game.create_player("a")
+            game.create_player("b")
+        self.assertEqual(games[0].game_state, games[1].game_state)
+        self.assertEqual(games[0].get_players(), games[1].get_players())
+        self.assertNotEqual(get_rng(42, 0).random(), get_rng(42, 1).random())
+
+    @override_settings(GRID_POOL_SIZE=4)
+    def test_pooled_grid_is_made_from_its_seed(self):
+        seed, grid, palettes = get_ready_grid(3, 10, 2)
+        self.assertEqual(len(_grid_pools[(3, 10, 2)]), 3)
+        game = Game(grid_size=3, seed=seed)
+        self.assertEqual(game.game_state, grid)
+        game.create_player("a")
+        game.create_player("b")
+        self.assertEqual(
+            [player["palette"] for player in game.get_players()],
+            [list(palette) for palette in palettes],
+        )
+
+        self.assertEqual(fill_grid_pools(), 1)
+        self.assertEqual(len(_grid_pools[(3, 10, 2)]), 4)
+        self.assertEqual(fill_grid_pools(), 0)
+
+    def test_seat_palettes_are_dropped_with_their_grid(self):
+        game = Game(seed=42)
+        palette = game.seat_palettes[0]
+        game.create_player("a")
+        self.assertEqual(game.get_player("a").palette, list(palette))
+        self.assertEqual(len(game.seat_palettes), 1)
+
+        game.reset_game_state()
+        self.assertEqual(game.seat_palettes, [])
+        game.create_player("b")
+        self.assertEqual(len(game.get_player("b").palette), game.palette_size)
+
+        # the events take the same seats
+        replayed = Game.replay(game.pending_events)
+        self.assertEqual(replayed.seat_palettes, [])
+        self.assertEqual(replayed.get_players(), game.get_players())
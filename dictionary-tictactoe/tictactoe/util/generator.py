@@ -0,0 +1,115 @@
+import random
+import secrets
+from collections import deque
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+
+from .matrix import create_grid
+from .palette import generate_random_palette, get_letter_distribution
+
+# grids that are generated ahead of the rooms that will need them, keyed by the size of the grid,
+# the size of the palettes and the number of seats. every grid is kept with the seed it's
+# generated from, so the room that takes it can reproduce it, and the palettes of its seats
+_grid_pools: Dict[Tuple[int, int, int], deque] = {}
+
+
+def new_seed() -> int:
+    # fits the BigIntegerField of GameModel.seed
+    return secrets.randbits(63)
+
+
+def get_rng(seed: int, seq: int) -> random.Random:
+    """Returns the generator of a game at an event of it
+
+    Every event of a game gets its own stream that is derived from the seed of the game,
+    so a game only keeps its seed in memory instead of a generator, and the same seed
+    and the same moves always generate the same grids and palettes.
+
+    Args:
+        seed (int): Seed of the game
+        seq (int): Seq of the last recorded event of the game
+
+    Returns:
+        random.Random: Seeded generator
+    """
+    return random.Random(f"{seed}:{seq}")
+
+
+def generate_seat_palettes(seed: int, grid: list, palette_size: int, seats: int) -> List[str]:
+    """Generates the palettes the seats of a new game start with, in the order they are taken.
+    They are weighted by the starting grid, which is the costly part of a palette,
+    so the grid is only weighted once for all of them.
+
+    Args:
+        seed (int): Seed of the game
+        grid (list): Grid the game starts with
+        palette_size (int): Number of letters in a palette
+        seats (int): Number of seats of the game
+
+    Returns:
+        List[str]: Letters of the palette of every seat
+    """
+    # a stream of its own, the streams of the events start from seq 0
+    rng = random.Random(f"{seed}:seats")
+    weights = get_letter_distribution().get_weights(grid)
+    return [
+        "".join(generate_random_palette(palette_size, rng=rng, weights=weights))
+        for _ in range(seats)
+    ]
+
+
+def generate_grids(
+    size: int, amount: int, palette_size: int, seats: int
+) -> List[Tuple[int, list, List[str]]]:
+    """Generates the starting grids of `amount` new games and the palettes of their seats
+
+    Args:
+        size (int): Grid size of the games
+        amount (int): Number of grids to generate
+        palette_size (int): Number of letters in a palette
+        seats (int): Number of seats of the games
+
+    Returns:
+        List[Tuple[int, list, List[str]]]: Seed of every game, the grid it starts with
+            and the palettes of its seats
+    """
+    grids = []
+    for _ in range(amount):
+        seed = new_seed()
+        grid = create_grid(size, size, rng=get_rng(seed, 0))
+        grids.append((seed, grid, generate_seat_palettes(seed, grid, palette_size, seats)))
+    return grids
+
+
+def get_ready_grid(size: int, palette_size: int, seats: int) -> Tuple[int, list, List[str]]:
+    """Takes a seed, its grid and the palettes of its seats from the pool of ready grids,
+    the pool is refilled with a whole batch if it runs out
+
+    Args:
+        size (int): Grid size of the game
+        palette_size (int): Number of letters in a palette
+        seats (int): Number of seats of the game
+
+    Returns:
+        Tuple[int, list, List[str]]: Seed of the game, the grid it starts with
+            and the palettes of its seats
+    """
+    pool = _grid_pools.setdefault((size, palette_size, seats), deque())
+    if not pool:
+        pool.extend(generate_grids(size, settings.GRID_POOL_SIZE, palette_size, seats))
+    return pool.popleft()
+
+
+def fill_grid_pools() -> int:
+    """Tops up every pool that is in use back to settings.GRID_POOL_SIZE
+
+    Returns:
+        int: Number of grids that are generated
+    """
+    generated = 0
+    for (size, palette_size, seats), pool in _grid_pools.items():
+        if (missing := settings.GRID_POOL_SIZE - len(pool)) > 0:
+            pool.extend(generate_grids(size, missing, palette_size, seats))
+            generated += missing
+    return generated
@@ -1,27 +1,33 @@
 import random
 import string
+import zlib
 
 
-def create_grid(rows: int, cols: int, letter_chance=5) -> list:
+def create_grid(rows: int, cols: int, letter_chance=5, rng: random.Random = random) -> list:
     """Creates a matrix filled with random letters.
 
+    The cells are decided from a single block of random bytes and the letters
+    are picked all at once, instead of a couple of random calls for every cell.
+
     Args:
         rows (int): the number of rows the matrix should have
         cols (int): the number of columns the matrix should have
         letter_chance (int) : chance of a letter appearing in the matrix, 0 no chance(matrix has no letters), 101 max chance (matrix filled with letters)
+        rng (random.Random, optional): Generator to use. Defaults to the random module.
 
     Returns:
         M (list): Returned matrix
     """
-    M = []
-    while len(M) < rows:
-        M.append([])
-        while len(M[-1]) < cols:
-            if random.randint(0, 100) < letter_chance:
-                M[-1].append(random.choice(string.ascii_uppercase))
-            else:
-                M[-1].append("")
-    return M
+    # a cell gets a letter if its byte is below the threshold, like randint(0, 100) < letter_chance
+    threshold = round(256 * min(max(letter_chance, 0), 101) / 101)
+    cells = rng.randbytes(rows * cols).translate(_letter_cell_tables[threshold])
+    letters = iter(rng.choices(string.ascii_uppercase, k=cells.count(1)))
+    cells = [next(letters) if cell else "" for cell in cells]
+    return [cells[row * cols : (row + 1) * cols] for row in range(rows)]
+
+
+# byte translation tables that map the bytes below a threshold to 1 and the rest to 0
+_letter_cell_tables = [bytes(int(b < threshold) for b in range(256)) for threshold in range(257)]
 
 
 def get_cols(grid: list) -> list:
@@ -30,3 +36,30 @@ def get_cols(grid: list) -> list:
 
 def get_rows(grid: list) -> list:
     return [[c for c in r] for r in grid]
+
+
+def pack_grid(grid: list) -> bytes:
+    """Packs the grid into compressed bytes, one byte per cell and a space for the empty ones
+
+    Args:
+        grid (list): Grid to pack, every cell is either empty or a single ascii letter
+
+    Returns:
+        bytes: Packed grid
+    """
+    return zlib.compress("".join(cell or " " for row in grid for cell in row).encode("ascii"))
+
+
+def unpack_grid(data: bytes, rows: int, cols: int) -> list:
+    """Unpacks a grid that is packed with pack_grid
+
+    Args:
+        data (bytes): Packed grid
+        rows (int): the number of rows the grid has
+        cols (int): the number of columns the grid has
+
+    Returns:
+        list: Unpacked grid
+    """
+    cells = zlib.decompress(data).decode("ascii")
+    return [[cell.strip() for cell in cells[row * cols : (row + 1) * cols]] for row in range(rows)]
@@ -1,22 +1,124 @@
+import functools
+import heapq
 import random
 import string
+from collections import Counter
+from typing import Dict, FrozenSet
 
 from django.conf import settings
 
 with open(settings.BASE_DIR / "tictactoe" / "util" / "words.txt") as f:
-    words = set(f.read().lower().splitlines())
+    words = frozenset(f.read().lower().splitlines())
 
 
-def generate_random_palette(amount: int) -> list:
-    """Generates a palette 1xAmount or 1x26 max
+class LetterDistribution:
+    """Letter and bigram frequencies of a dictionary, used to weight the palettes"""
+
+    def __init__(self, dictionary: FrozenSet[str]) -> None:
+        letters = Counter()
+        self.bigrams = Counter()
+        for word in dictionary:
+            word = word.upper()
+            letters.update(word)
+            self.bigrams.update(word[i : i + 2] for i in range(len(word) - 1))
+
+        # every letter keeps a chance to appear even if the dictionary doesn't use it
+        self.letters = {letter: letters[letter] + 1 for letter in string.ascii_uppercase}
+
+    def get_weights(self, grid: list = None, grid_bias: float = 1.0) -> Dict[str, float]:
+        """Returns the weight of each letter, optionally biased by the letters on the grid
+
+        Every empty cell next to a letter is an open spot for a word, so the letters
+        that make common bigrams with the letters around the empty cells get boosted.
+
+        Args:
+            grid (list, optional): Game state to bias the weights with. Defaults to None.
+            grid_bias (float, optional): How much the grid affects the weights. Defaults to 1.0.
+
+        Returns:
+            Dict[str, float]: Letter to weight
+        """
+        if not grid:
+            return self.letters
+
+        # count the letters that are right before or right after the empty cells first,
+        # so the bigram lookups don't depend on the size of the grid
+        before, after = Counter(), Counter()
+        rows, cols = len(grid), len(grid[0])
+        for x in range(rows):
+            for y in range(cols):
+                if grid[x][y]:
+                    continue
+                # the letter placed at x, y would come after the letters above or on the left
+                # and before the letters below or on the right of it
+                if x > 0 and grid[x - 1][y]:
+                    before[grid[x - 1][y]] += 1
+                if y > 0 and grid[x][y - 1]:
+                    before[grid[x][y - 1]] += 1
+                if x + 1 < rows and grid[x + 1][y]:
+                    after[grid[x + 1][y]] += 1
+                if y + 1 < cols and grid[x][y + 1]:
+                    after[grid[x][y + 1]] += 1
+
+        boosts = {
+            letter: sum(count * self.bigrams[prev + letter] for prev, count in before.items())
+            + sum(count * self.bigrams[letter + nxt] for nxt, count in after.items())
+            for letter in self.letters
+        }
+
+        if not (max_boost := max(boosts.values(), default=0)):
+            return self.letters
+
+        return {
+            letter: weight * (1 + grid_bias * boosts[letter] / max_boost)
+            for letter, weight in self.letters.items()
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def get_letter_distribution(dictionary: FrozenSet[str] = words) -> LetterDistribution:
+    """Computes the letter distribution of the dictionary once and caches it
+
+    Args:
+        dictionary (FrozenSet[str], optional): Words to compute the frequencies from.
+            Defaults to the loaded words.txt.
+
+    Returns:
+        LetterDistribution: Distribution of the dictionary
+    """
+    return LetterDistribution(dictionary)
+
+
+def generate_random_palette(
+    amount: int,
+    grid: list = None,
+    rng: random.Random = random,
+    weights: Dict[str, float] = None,
+) -> list:
+    """Generates a palette 1xAmount or 1x26 max, letters that are frequent
+    in the dictionary and that fit the letters on the grid are more likely to be picked
 
     Args:
         amount (int): Length of the generated word palette
+        grid (list, optional): Game state to bias the palette with. Defaults to None.
+        rng (random.Random, optional): Generator to use. Defaults to the random module.
+        weights (Dict[str, float], optional): Weights from LetterDistribution.get_weights,
+            to generate several palettes for the same grid. Defaults to the weights of `grid`.
 
     Returns:
-        list: Returns a list of shuffled ascii_uppercase letters
+        list: Returns a list of distinct ascii_uppercase letters in a random order
     """
-    return random.sample(string.ascii_uppercase, amount)
+    if amount > len(string.ascii_uppercase):
+        raise ValueError("Sample larger than population")
+
+    if weights is None:
+        weights = get_letter_distribution().get_weights(grid)
+    # weighted sampling without replacement (Efraimidis-Spirakis),
+    # the letters with the largest rng.random() ** (1 / weight) keys are picked
+    keys = {letter: rng.random() ** (1 / weight) for letter, weight in weights.items()}
+    palette = heapq.nlargest(amount, keys, key=keys.get)
+    rng.shuffle(palette)
+    return palette
 
 
 def check_if_word(word: str) -> bool:
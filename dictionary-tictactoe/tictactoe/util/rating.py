@@ -0,0 +1,124 @@
+from typing import Dict, Iterable, List, Tuple, Union
+
+DEFAULT_RATING = 1500.0
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def rate_game(
+    ratings: Dict[str, float], winner: str, players: Iterable[str], k_factor: float = 32
+) -> Dict[str, float]:
+    """Elo ratings of the players after `winner` made the word
+
+    The winner beats every other player of the room, the K factor is split between
+    the opponents so a win in a larger room isn't worth more than a win in a duel.
+
+    Args:
+        ratings (Dict[str, float]): Ratings of the players before the game,
+            the players that aren't in it start with DEFAULT_RATING
+        winner (str): Name of the player that won
+        players (Iterable[str]): Names of every rated player in the game, including the winner
+        k_factor (float, optional): Max rating change of a game. Defaults to 32.
+
+    Returns:
+        Dict[str, float]: New ratings of the players of the game,
+            empty if the game can't be rated
+    """
+    before = {name: ratings.get(name, DEFAULT_RATING) for name in players}
+    if winner not in before or len(before) < 2:
+        return {}
+
+    after = dict(before)
+    k_factor /= len(before) - 1
+    for name, rating in before.items():
+        if name == winner:
+            continue
+        change = k_factor * (1 - expected_score(before[winner], rating))
+        after[winner] += change
+        after[name] -= change
+
+    return after
+
+
+class FenwickTree:
+    """Prefix sums over a fixed number of counters, both updated and queried in O(log n)"""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int) -> None:
+        index += 1
+        while index <= self.size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index: int) -> int:
+        """Sum of the counters from 0 to `index`, both included"""
+        total = 0
+        index += 1
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+
+class Leaderboard:
+    """Ratings of the players, ranked through a Fenwick tree over whole rating points
+
+    Players with the same whole rating share their rank, so a rank query is a single prefix sum
+    no matter how many players are rated. The top of the board is read bucket by bucket
+    from the highest rating down.
+    """
+
+    def __init__(self, max_rating: int = 4000) -> None:
+        self.max_rating = max_rating
+        self.ratings: Dict[str, float] = {}
+        self._counts = FenwickTree(max_rating + 1)
+        self._buckets: Dict[int, set] = {}
+
+    def __len__(self) -> int:
+        return len(self.ratings)
+
+    def _get_bucket(self, rating: float) -> int:
+        return min(max(int(rating), 0), self.max_rating)
+
+    def get(self, name: str) -> Union[float, None]:
+        return self.ratings.get(name)
+
+    def set(self, name: str, rating: float) -> None:
+        if (old_rating := self.ratings.get(name)) is not None:
+            old_bucket = self._get_bucket(old_rating)
+            self._counts.add(old_bucket, -1)
+            self._buckets[old_bucket].discard(name)
+            if not self._buckets[old_bucket]:
+                del self._buckets[old_bucket]
+
+        bucket = self._get_bucket(rating)
+        self.ratings[name] = rating
+        self._counts.add(bucket, 1)
+        self._buckets.setdefault(bucket, set()).add(name)
+
+    def get_rank(self, name: str) -> Union[int, None]:
+        """Returns the 1-based rank of the player, None if the player isn't rated"""
+        if (rating := self.ratings.get(name)) is None:
+            return None
+        return len(self.ratings) - self._counts.prefix_sum(self._get_bucket(rating)) + 1
+
+    def get_top(self, amount: int) -> List[Tuple[int, str, float]]:
+        """Returns the rank, name and rating of the best `amount` players"""
+        top = []
+        rank = 1
+        for bucket in range(self.max_rating, -1, -1):
+            if len(top) >= amount:
+                break
+            if not (names := self._buckets.get(bucket)):
+                continue
+
+            for name in sorted(names, key=lambda name: -self.ratings[name])[: amount - len(top)]:
+                top.append((rank, name, self.ratings[name]))
+            rank += len(names)
+
+        return top
@@ -0,0 +1,140 @@
+import functools
+import random
+from collections import Counter
+from typing import Callable, Dict, List, Tuple, Union
+
+from tictactoe.game import Game, Player, RoomState
+
+from .solver import find_best_move
+
+Move = Union[Tuple[int, int, str], None]
+
+
+def pick_random_move(game: Game, player: Player, max_windows: int) -> Move:
+    empty_cells = [
+        (x, y) for x, row in enumerate(game.game_state) for y, c in enumerate(row) if not c
+    ]
+    if not empty_cells or not player.palette_length:
+        return None
+
+    x, y = random.choice(empty_cells)
+    return x, y, random.choice(player.palette)
+
+
+def pick_greedy_move(game: Game, player: Player, max_windows: int) -> Move:
+    # no time budget, how far the search gets can't depend on the load of the machine
+    return find_best_move(
+        game.game_state, player.palette, game.word_size, time_budget=None, max_windows=max_windows
+    )
+
+
+# name to the function that picks the move and whether the strategy steals when it can
+STRATEGIES: Dict[str, Tuple[Callable[[Game, Player, int], Move], bool]] = {
+    "random": (pick_random_move, False),
+    "greedy": (pick_greedy_move, False),
+    "thief": (pick_greedy_move, True),
+}
+
+
+def simulate_game(
+    params: dict,
+    strategies: List[str],
+    seed: int,
+    move_interval: int = 2,
+    max_moves: int = 500,
+    max_windows: int = 50,
+) -> dict:
+    """Plays a single game on the Game engine without any server
+
+    Every player makes a move every `move_interval` seconds of simulated time, in the order
+    of their seats, and the palettes are rotated every palette_change_cooldown seconds.
+
+    Args:
+        params (dict): Arguments of Game, and steal_amount and steal_cooldown of the players
+        strategies (List[str]): Strategy of every seat, keys of STRATEGIES
+        seed (int): Seed of the game and of the strategies, the same seed plays the same game
+        move_interval (int, optional): Seconds between the moves of a player. Defaults to 2.
+        max_moves (int, optional): Moves after which the game is given up. Defaults to 500.
+        max_windows (int, optional): Windows the solver of a greedy move looks at.
+            Defaults to 50.
+
+    Returns:
+        dict: Simulated seconds, moves made, whether a word was made and the winning strategy
+    """
+    random.seed(seed)
+    params = dict(params)
+    player_class = functools.partial(
+        Player,
+        steal_amount=params.pop("steal_amount", 5),
+        steal_cooldown=params.pop("steal_cooldown", 10),
+    )
+    game = Game(max_players=len(strategies), seed=seed, **params)
+    seats = [game.create_player(f"player_{i}", player_class) for i in range(len(strategies))]
+    # the steal cooldowns run on the simulated clock, which starts at 0
+    for player in seats:
+        player.steal_timer = 0
+
+    seconds, moves, winner = 0, 0, None
+    while game.room_state == RoomState.GAME_IN_PROGRESS and moves < max_moves:
+        seconds += move_interval
+        if seconds % game.palette_change_cooldown < move_interval:
+            game.rotate_palettes()
+
+        made_a_move = False
+        for player, strategy in zip(seats, strategies):
+            pick_move, steals = STRATEGIES[strategy]
+            if steals:
+                game.steal_palette(player.name, now=seconds * 1000)
+            if not player.can_play or not (move := pick_move(game, player, max_windows)):
+                continue
+
+            x, y, letter = move
+            if game.update_game(x, y, player.name, letter):
+                moves += 1
+                made_a_move = True
+            if game.check_for_game_finish():
+                winner = strategy
+                break
+
+        # nothing is kept for a db in the simulation
+        game.pop_pending_events()
+        if not made_a_move and winner is None and all(all(row) for row in game.game_state):
+            break
+
+    return {"seconds": seconds, "moves": moves, "finished": winner is not None, "winner": winner}
+
+
+def simulate_batch(
+    params: dict, strategies: List[str], seeds: range, **options
+) -> Dict[str, Counter]:
+    """Plays a game for every seed and counts the outcomes, so only the histograms
+    travel back from the process pool instead of a result per game
+
+    Returns:
+        Dict[str, Counter]: Histograms of the seconds and moves of the games,
+            and the counts of the finished games and of the winning strategies
+    """
+    seconds, moves, outcomes = Counter(), Counter(), Counter()
+    for seed in seeds:
+        result = simulate_game(params, strategies, seed, **options)
+        seconds[result["seconds"]] += 1
+        moves[result["moves"]] += 1
+        outcomes["games"] += 1
+        if result["finished"]:
+            outcomes["finished"] += 1
+            outcomes[f"won_by_{result['winner']}"] += 1
+    return {"seconds": seconds, "moves": moves, "outcomes": outcomes}
+
+
+def get_percentile(histogram: Counter, percentile: float) -> int:
+    """Returns the smallest value that `percentile` percent of the counted values don't exceed"""
+    total = sum(histogram.values())
+    if not total:
+        return 0
+
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen * 100 >= total * percentile:
+            return value
+    return value
@@ -0,0 +1,140 @@
+import functools
+import random
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+from .palette import words
+
+
+class WordIndex:
+    """Words of a single length indexed by (position, letter)
+
+    A window on the grid can have empty cells anywhere, not only at its end,
+    so the words that fit a window are found by intersecting the sets of its filled positions.
+    """
+
+    def __init__(self, dictionary: FrozenSet[str], word_size: int) -> None:
+        self.word_size = word_size
+        self.words = frozenset(word.upper() for word in dictionary if len(word) == word_size)
+        self.positions: Dict[Tuple[int, str], set] = defaultdict(set)
+        for word in self.words:
+            for i, letter in enumerate(word):
+                self.positions[(i, letter)].add(word)
+
+    def count_matches(self, pattern: List[str]) -> int:
+        """Counts the words that fit the pattern
+
+        Args:
+            pattern (List[str]): Letters of the window, empty strings for the empty cells
+
+        Returns:
+            int: Number of words that can still be made from the pattern
+        """
+        filled = sorted(
+            (
+                self.positions.get((i, letter), frozenset())
+                for i, letter in enumerate(pattern)
+                if letter
+            ),
+            key=len,
+        )
+        if not filled:
+            return len(self.words)
+
+        # intersect starting from the smallest set
+        matches = set(filled[0])
+        for candidates in filled[1:]:
+            matches &= candidates
+            if not matches:
+                break
+        return len(matches)
+
+
+@functools.lru_cache(maxsize=None)
+def get_word_index(word_size: int, dictionary: FrozenSet[str] = words) -> WordIndex:
+    return WordIndex(dictionary, word_size)
+
+
+def _get_windows(game_state: list, word_size: int) -> List[List[Tuple[int, int]]]:
+    rows, cols = len(game_state), len(game_state[0])
+    windows = []
+    for x in range(rows):
+        for y in range(cols - word_size + 1):
+            windows.append([(x, y + i) for i in range(word_size)])
+    for y in range(cols):
+        for x in range(rows - word_size + 1):
+            windows.append([(x + i, y) for i in range(word_size)])
+    return windows
+
+
+def find_best_move(
+    game_state: list,
+    palette: List[str],
+    word_size: int,
+    time_budget: Optional[float] = 0.2,
+    max_windows: Optional[int] = None,
+) -> Union[Tuple[int, int, str], None]:
+    """Searches for the placement that gets a window of the grid closest to a word
+
+    A placement scores for every window it's in that can still become a word,
+    windows that are closer to being full score more. A placement that completes a word
+    is returned right away.
+
+    Args:
+        game_state (list): Grid of the game
+        palette (List[str]): Letters that can be placed
+        word_size (int): Length of the words that finish the game
+        time_budget (Optional[float], optional): Seconds the search can take,
+            the best placement found so far is returned once it runs out. Defaults to 0.2.
+        max_windows (Optional[int], optional): Windows with letters in them the search looks at,
+            unlike the time budget the same grid always gets the same move. Defaults to None.
+
+    Returns:
+        Union[Tuple[int, int, str], None]: x, y and letter of the move, None if there is no move
+    """
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    index = get_word_index(word_size)
+    # sorted, so the order of the moves doesn't depend on the hash seed of the process
+    letters = sorted(set(palette))
+    scores = defaultdict(int)
+
+    windows = _get_windows(game_state, word_size)
+    # look at the windows that already have letters first, they are the most promising ones
+    windows.sort(key=lambda window: -sum(1 for x, y in window if game_state[x][y]))
+
+    for window in windows:
+        if deadline is not None and time.monotonic() > deadline:
+            break
+
+        pattern = [game_state[x][y] for x, y in window]
+        filled = sum(1 for letter in pattern if letter)
+        if filled == 0 or filled == word_size:
+            continue
+        if max_windows is not None:
+            if max_windows <= 0:
+                break
+            max_windows -= 1
+
+        for i, (x, y) in enumerate(window):
+            if pattern[i]:
+                continue
+            for letter in letters:
+                pattern[i] = letter
+                if index.count_matches(pattern):
+                    if filled + 1 == word_size:
+                        return x, y, letter
+                    scores[(x, y, letter)] += (filled + 1) ** 2
+            pattern[i] = ""
+
+    if scores:
+        best = max(scores.values())
+        return random.choice([move for move, score in scores.items() if score == best])
+
+    # nothing on the grid to build on, put a letter on a random empty cell
+    empty_cells = [(x, y) for x, row in enumerate(game_state) for y, c in enumerate(row) if not c]
+    if not empty_cells or not letters:
+        return None
+
+    x, y = random.choice(empty_cells)
+    return x, y, random.choice(letters)
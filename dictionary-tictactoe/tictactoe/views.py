@@ -1,8 +1,19 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.views.decorators.cache import cache_page
+from tictactoe.helper.compression import get_compression_stats
+from tictactoe.helper.db import get_db_pool_stats
+from tictactoe.helper.health import is_draining
+from tictactoe.helper.leaderboard import read_leaderboard, read_rating_id
+from tictactoe.helper.mixins import get_model_cache_stats, get_room_stats
 
 # Create your views here.
 
 
+@cache_page(settings.PAGE_CACHE_SECONDS)
 def index(request):
     return render(
         request,
@@ -10,13 +21,53 @@ def index(request):
     )
 
 
+@cache_page(settings.PAGE_CACHE_SECONDS)
 def join_room(request, room_id=""):
     return render(request, "join-room.html", {"room_id": room_id})
 
 
 def room(request, room_name):
-    return render(request, "room.html", {"room_name": room_name})
+    # the page reads the room id from its url, so every room shares the same rendered page
+    page = cache.get_or_set(
+        "room_page", lambda: render_to_string("room.html"), settings.PAGE_CACHE_SECONDS
+    )
+    return HttpResponse(page)
+
+
+def board(request, board_name):
+    page = cache.get_or_set(
+        "board_page", lambda: render_to_string("board.html"), settings.PAGE_CACHE_SECONDS
+    )
+    return HttpResponse(page)
 
 
 def create_room(request):
     return redirect(room, room_name="abc")
+
+
+def leaderboard(request):
+    try:
+        amount = min(int(request.GET.get("top", 10)), settings.LEADERBOARD_MAX_TOP)
+    except ValueError:
+        amount = 10
+
+    # the player is asked for with the token it's rated under, the ids of the others aren't known
+    token = request.GET.get("player")
+    return JsonResponse(read_leaderboard(amount, read_rating_id(token) if token else None))
+
+
+def liveness(request):
+    return JsonResponse({"status": "alive"})
+
+
+def readiness(request):
+    stats = {
+        **get_room_stats(),
+        "db_pool": get_db_pool_stats(),
+        "model_cache": get_model_cache_stats(),
+        "compression": get_compression_stats(),
+    }
+    if is_draining():
+        return JsonResponse({"status": "draining", **stats}, status=503)
+
+    return JsonResponse({"status": "ready", **stats})
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from .consumers import RoomConsumer
+from .consumers import BoardConsumer, RoomConsumer
 
 websocket_urlpatterns = [
     path("ws/room/<uuid:room_id>/", RoomConsumer.as_asgi()),
+    path("ws/board/<uuid:room_id>/", BoardConsumer.as_asgi()),
 ]